@@ -0,0 +1,112 @@
+import glob
+import gzip
+import json
+import os
+import time
+from collections import Counter, defaultdict
+
+from app.response_dataset import iter_records
+from app.utterance import Utterance
+
+def normalize(message):
+    return " ".join(message.lower().split())
+
+def load_traffic(transcript_dir="logs/transcripts", max_files=48):
+    """Counter of messages in the most recent transcript files, or None if there are none
+
+    Counted while streaming, so memory grows with distinct messages rather than traffic volume.
+    """
+    files = sorted(glob.glob(os.path.join(transcript_dir, "*.jsonl.gz")), key=os.path.getmtime)[-max_files:]
+    if not files:
+        return None
+    counts = Counter()
+    for path in files:
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        counts[json.loads(line)["customer_message"]] += 1
+                    except (ValueError, KeyError):
+                        continue
+        except (OSError, EOFError):
+            continue  # a file still being written can end mid-stream
+    return counts or None
+
+def load_dataset_messages(responses_file="app/responses.json"):
+    # A generator, so large JSONL datasets are counted without being held in memory
+    return (entry["customer_message"] for entry in iter_records(responses_file))
+
+class CacheWarmer:
+    """Pre-computes embeddings, intents and cacheable replies for the most frequent messages"""
+
+    def __init__(self, bot, top_n=500, time_budget=20.0, batch_size=128):
+        self.bot = bot
+        self.top_n = top_n
+        self.time_budget = time_budget
+        self.batch_size = batch_size
+
+    @staticmethod
+    def top_messages(messages, top_n):
+        """[(raw message, count)] for the top_n normalized messages, plus the total message count
+
+        messages is an iterable of messages or a Counter of them, as returned by load_traffic.
+        """
+        raw = messages if isinstance(messages, Counter) else Counter(messages)
+        counts = Counter()
+        variants = defaultdict(Counter)
+        for message, count in raw.items():
+            key = normalize(message)
+            counts[key] += count
+            variants[key][message] += count
+        top = [(variants[key].most_common(1)[0][0], count) for key, count in counts.most_common(top_n)]
+        return top, sum(counts.values())
+
+    def run(self, messages=None, source=None):
+        started = time.perf_counter()
+        if messages is None:
+            messages = load_traffic()
+            source = "transcripts"
+            if messages is None:
+                messages = load_dataset_messages(self.bot.enhanced_ai_generator.responses_file)
+                source = "responses.json"
+        top, total = self.top_messages(messages, self.top_n)
+
+        warmed = 0
+        warmed_mass = 0
+        replies = 0
+        cache = self.bot.semantic_cache
+        for start in range(0, len(top), self.batch_size):
+            if time.perf_counter() - started >= self.time_budget:
+                break
+            batch = top[start:start + self.batch_size]
+            texts = [message for message, _ in batch]
+            # One large encode call fills the embedding cache for the whole batch
+            embeddings = self.bot.model.get_embeddings(texts)
+            for (message, count), embedding in zip(batch, embeddings):
+                # Generation dominates the batch, so the budget is enforced per message too
+                if time.perf_counter() - started >= self.time_budget:
+                    break
+                utterance = Utterance(message)
+                intent = self.bot.detect_intent(utterance)
+                if (cache is not None and cache.cacheable(intent, utterance)
+                        and self.bot.policy_table.fast_path(intent) is None):
+                    response = self.bot.enhanced_ai_generator.generate_response(intent, utterance)
+                    cache.insert(intent, embedding, response)
+                    replies += 1
+                warmed += 1
+                warmed_mass += count
+
+        expected_mass = sum(count for _, count in top)
+        return {
+            "source": source,
+            "messages_seen": total,
+            "candidates": len(top),
+            "warmed": warmed,
+            "cached_replies": replies,
+            # Share of traffic the top-N could serve from cache, and how much of it was actually warmed
+            "expected_hit_rate": round(expected_mass / total, 4) if total else 0.0,
+            "warmed_hit_rate": round(warmed_mass / total, 4) if total else 0.0,
+            "recovered": round(warmed_mass / expected_mass, 4) if expected_mass else 0.0,
+            "duration_s": round(time.perf_counter() - started, 3),
+            "budget_s": self.time_budget,
+        }
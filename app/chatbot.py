@@ -1,36 +1,310 @@
+import hashlib
 import json
-import re
-from app.model_utils import AirlineModel
-from app.vector_db import VectorDB
+import time
 from app.enhanced_ai_generator import EnhancedAIResponseGenerator
+from app.latency_budget import StageCosts
+from app.shared_cache import TierStats
+from app.policy_cache import PolicyTable
+from app.utterance import Utterance
 
 class AirlineChatbot:
-    def __init__(self):
-        self.model = AirlineModel()
-        self.db = VectorDB()
-        self.enhanced_ai_generator = EnhancedAIResponseGenerator()
-
-        with open("app/airline_policy.json", "r") as f:
-            self.policies = json.load(f)
-
-        # Preload intents into ChromaDB
-        import os
-        if self.db.collection.count() == 0:  # if empty
-            with open("data/sample_intents.json") as f:
-                intents = json.load(f)
-            for item in intents:
-                for ex in item["examples"]:
-                    vector = self.model.get_embedding(ex)
-                    self.db.insert([vector])
-            print("✅ Preloaded intents into ChromaDB!")
+    def __init__(self, policy_file="app/airline_policy.json", intents_file="data/sample_intents.json",
+                 policy_fast_path=True, semantic_cache=None, responses_file="app/responses.json",
+                 model=None, db=None, flight_data=None, lite=False, classifier=None, lite_min_confidence=0.35,
+                 shared_cache=None, cache_scope="default"):
+        self.policy_file = policy_file
+        self.intents_file = intents_file
+        self.policy_fast_path = policy_fast_path
+        self.semantic_cache = semantic_cache
+        self.stage_costs = StageCosts()
+        # Second-level response cache shared across nodes; cache_scope keeps tenants apart
+        self.shared_cache = shared_cache
+        self.cache_scope = cache_scope
+        self.response_tier = TierStats()
+        self.lite = lite
+        self.lite_min_confidence = lite_min_confidence
+        if lite:
+            # Lite mode: hashed n-gram classifier only, so torch/transformers/chromadb are never imported
+            from app.lite_classifier import LiteIntentClassifier
+            self.classifier = classifier or LiteIntentClassifier.load()
+            self.model = None
+            self.db = None
+        else:
+            from app.model_utils import AirlineModel
+            from app.vector_db import VectorDB
+            self.classifier = None
+            # model/db can be shared, e.g. one embedding model across tenants
+            self.model = model or AirlineModel(shared_cache=shared_cache)
+            self.db = db or VectorDB()
+        self._digests = {"responses": self._file_digest(responses_file), "policies": self._file_digest(policy_file)}
+        self.enhanced_ai_generator = EnhancedAIResponseGenerator(responses_file, flight_data=flight_data)
+
+        self.policy_table = self._load_policies()
+        self._set_dataset_version()
+
+        # Preload intents into ChromaDB (only new or changed examples get embedded)
+        added, removed = self.sync_intents()
+        if added or removed:
+            print(f"✅ Preloaded intents into ChromaDB! (+{added} / -{removed})")
+
+    @staticmethod
+    def _file_digest(path):
+        digest = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _set_dataset_version(self):
+        # Content-based, so every node serving the same files shares the same shared-cache keys
+        combined = f"{self._digests['responses']}:{self._digests['policies']}"
+        self.dataset_version = hashlib.sha1(combined.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _example_id(intent, example):
+        """Stable vector id derived from the example's content"""
+        return hashlib.sha1(f"{intent}\x1f{example}".encode("utf-8")).hexdigest()
+
+    def _plan_intents(self):
+        """Read and validate the intents file; returns (wanted, missing ids, stale ids)"""
+        with open(self.intents_file) as f:
+            intents = json.load(f)
+
+        wanted = {}
+        for item in intents:
+            if not isinstance(item.get("intent"), str) or not isinstance(item.get("examples"), list):
+                raise ValueError(f"{self.intents_file}: every entry needs an 'intent' and a list of 'examples'")
+            for ex in item["examples"]:
+                wanted[self._example_id(item["intent"], ex)] = (item["intent"], ex)
+
+        existing = self.db.ids()
+        missing = [vid for vid in wanted if vid not in existing]
+        stale = [vid for vid in existing if vid not in wanted]
+        return wanted, missing, stale
+
+    def _add_intent_vectors(self, wanted, missing, batch_size=16):
+        # Small batches with a yield in between keep a large re-embed from starving requests
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            vectors = self.model.get_embeddings([wanted[vid][1] for vid in batch])
+            self.db.insert(
+                [list(map(float, v)) for v in vectors],
+                ids=batch,
+                metadatas=[{"intent": wanted[vid][0]} for vid in batch]
+            )
+            time.sleep(0)
+
+    def sync_intents(self, batch_size=16):
+        """Embed added/changed intent examples and drop stale vectors from ChromaDB"""
+        if self.db is None:
+            return 0, 0
+        wanted, missing, stale = self._plan_intents()
+        self._add_intent_vectors(wanted, missing, batch_size)
+        self.db.delete(stale)
+        return len(missing), len(stale)
+
+    def _load_policies(self):
+        with open(self.policy_file, "r") as f:
+            policies = json.load(f)
+        if not isinstance(policies, dict) or not all(isinstance(v, str) for v in policies.values()):
+            raise ValueError(f"{self.policy_file}: expected an object of intent -> policy text")
+        return PolicyTable(policies)
+
+    @property
+    def policies(self):
+        """intent -> policy text, from the live policy table"""
+        return {intent: entry.text for intent, entry in self.policy_table.entries.items()}
+
+    def reload_policies(self):
+        """Reload the policy file and swap the policy table in one assignment"""
+        return self.reload(responses=False, intents=False)["policies"]
+
+    def invalidate_caches(self):
+        """Drop cached replies that may have been built from the previous datasets"""
+        if self.semantic_cache is not None:
+            self.semantic_cache.clear()
+
+    def reload(self, responses=True, policies=True, intents=True):
+        """Reload the selected datasets all-or-nothing
+
+        Every file is parsed and validated, and new intent vectors are added, before anything
+        the request path reads is swapped; a broken file leaves the previous state serving.
+        Stale vectors are only deleted after the swap.
+        """
+        started = time.time()
+        result = {}
+        digests = dict(self._digests)
+        if responses:
+            digests["responses"] = self._file_digest(self.enhanced_ai_generator.responses_file)
+        if policies:
+            digests["policies"] = self._file_digest(self.policy_file)
+        loaded_responses = self.enhanced_ai_generator.load_tables() if responses else None
+        loaded_policies = self._load_policies() if policies else None
+        stale = []
+        if intents and self.db is not None:
+            wanted, missing, stale = self._plan_intents()
+            self._add_intent_vectors(wanted, missing)  # additive: old intents keep matching
+            result["vectors_added"] = len(missing)
+
+        if loaded_responses is not None:
+            result["responses"] = self.enhanced_ai_generator.install_tables(loaded_responses)
+        if loaded_policies is not None:
+            self.policy_table = loaded_policies
+            result["policies"] = len(self.policy_table.entries)
+        if responses or policies:
+            # New version after the tables, so a reply keyed under it was built from the new datasets
+            self._digests = digests
+            self._set_dataset_version()
+            result["dataset_version"] = self.dataset_version
+            self.invalidate_caches()
+
+        if intents and self.db is not None:
+            self.db.delete(stale)
+            result["vectors_removed"] = len(stale)
+        result["duration_ms"] = round((time.time() - started) * 1000, 2)
+        return result
 
     def get_response(self, user_input):
-        embedding = self.model.get_embedding(user_input)
-        matches = self.db.search([embedding])
+        return self.get_reply(user_input)["response"]
+
+    def get_reply(self, user_input, deadline=None):
+        """Classify and answer a message; policy intents are served from the precomputed table
+
+        With a deadline, stages whose estimated cost no longer fits are dropped in order:
+        vector search, then the embedding (and semantic cache), then generation itself in
+        favour of the canned policy answer. The level used is returned as "degradation".
+        """
+        timings = {}
+        costs = self.stage_costs
+        started = time.perf_counter()
+        utterance = Utterance.of(user_input, self.model.get_embedding if self.model else None)
+        intent, confidence = self.classify(utterance)
+        timings["classify_ms"] = self._elapsed_ms(started)
+
+        if self.policy_fast_path:
+            entry = self.policy_table.fast_path(intent)
+            if entry is not None:
+                return self._reply(intent, entry.text, timings, policy=entry, tone="Informative",
+                                   confidence=confidence)
+
+        level = "full"
+        cacheable = False
+        # Read before generating: a reload swaps the tables first, then the version
+        dataset_version = self.dataset_version
+        if not self.lite:
+            if not costs.allows(deadline, "embed", "generate"):
+                level = "keyword_only"
+            else:
+                stage = time.perf_counter()
+                embedding = utterance.embedding
+                timings["embed_ms"] = self._elapsed_ms(stage)
+                costs.observe("embed", timings["embed_ms"])
+
+                cache = self.semantic_cache
+                cacheable = cache is not None and cache.cacheable(intent, utterance)
+                if cacheable:
+                    stage = time.perf_counter()
+                    cached = cache.lookup(intent, embedding)
+                    timings["cache_ms"] = self._elapsed_ms(stage)
+                    self.response_tier.record(cached is not None, 1, timings["cache_ms"])
+                    if cached is None and self.shared_cache is not None:
+                        # Exact-text match from another node; promoted into the local cache
+                        cached = self.shared_cache.get_response(self.cache_scope, dataset_version, intent,
+                                                                self._cache_text(utterance))
+                        if cached is not None:
+                            cache.insert(intent, embedding, cached)
+                        timings["cache_ms"] = self._elapsed_ms(stage)
+                    if cached is not None:
+                        return self._reply(intent, cached, timings)
+
+                if not costs.allows(deadline, "search", "generate"):
+                    level = "no_search"
+                else:
+                    stage = time.perf_counter()
+                    matches = self.db.search([embedding])
+                    timings["search_ms"] = self._elapsed_ms(stage)
+                    costs.observe("search", timings["search_ms"])
+                    confidence = self._confidence(matches)
+
+        if not costs.allows(deadline, "generate"):
+            entry = self.policy_table.get(intent) or self.policy_table.get("general")
+            if entry is not None:
+                return self._reply(intent, entry.text, timings, tone="Informative", confidence=confidence,
+                                   degradation="policy_fallback")
+
+        # Use enhanced AI-powered dynamic response generator with large dataset
+        generate_started = time.perf_counter()
+        response = self.enhanced_ai_generator.generate_response(intent, utterance)
+        timings["generate_ms"] = self._elapsed_ms(generate_started)
+        costs.observe("generate", timings["generate_ms"])
+        if cacheable and dataset_version == self.dataset_version:  # skip if a reload raced this request
+            cache.insert(intent, embedding, response, timings.get("search_ms", 0.0) + timings["generate_ms"])
+            if self.shared_cache is not None:
+                self.shared_cache.set_response(self.cache_scope, dataset_version, intent,
+                                               self._cache_text(utterance), response)
+        return self._reply(intent, response, timings, confidence=confidence, degradation=level)
+
+    def _reply(self, intent, response, timings, policy=None, tone=None, confidence=None, degradation="full"):
+        if tone is None:
+            tone = self.enhanced_ai_generator.response_tones.get(response)
+        self.stage_costs.served(degradation)
+        return {
+            "intent": intent,
+            "response": response,
+            "policy": policy,
+            "tone": tone,
+            "confidence": confidence,
+            "degradation": degradation,
+            "timings": timings,
+        }
+
+    @staticmethod
+    def _cache_text(utterance):
+        return " ".join(utterance.lower.split())
+
+    def cache_tiers(self):
+        """Hit rate and lookup latency per tier, local first"""
+        tiers = {"response": {"l1": self.response_tier.stats()}}
+        if self.model is not None:
+            tiers["embedding"] = {"l1": self.model.embedding_tier.stats()}
+        if self.shared_cache is not None:
+            shared = self.shared_cache.stats()
+            tiers["response"]["l2"] = shared["response"]
+            if "embedding" in tiers:
+                tiers["embedding"]["l2"] = shared["embedding"]
+        return tiers
+
+    @staticmethod
+    def _elapsed_ms(started):
+        return round((time.perf_counter() - started) * 1000, 3)
+
+    @staticmethod
+    def _confidence(matches):
+        """Cosine similarity of the nearest intent example (embeddings are unit length, Chroma returns squared L2)"""
+        try:
+            distance = matches["distances"][0][0]
+        except (KeyError, IndexError, TypeError):
+            return None
+        return round(max(0.0, 1 - distance / 2), 4)
+
+    def classify(self, utterance):
+        """(intent, confidence); the keyword rules decide, and in lite mode the n-gram classifier
+        only labels messages they leave as "general", when it is confident enough"""
+        intent = self.detect_intent(utterance)
+        if self.classifier is None or intent != "general":
+            return intent, None
+        predicted, confidence = self.classifier.predict(utterance.lower)
+        if confidence >= self.lite_min_confidence:
+            intent = predicted
+        return intent, round(confidence, 4)
+
+    def detect_intent(self, user_input):
+        """Keyword-based intent detection"""
         intent = "general"
 
         # Enhanced keyword-based intent mapping
-        user_lower = user_input.lower()
+        utterance = Utterance.of(user_input)
+        user_lower = utterance.lower
         
         # Check for specific intents first (most specific to least specific)
         
@@ -58,6 +332,9 @@ class AirlineChatbot:
         # Wi-Fi intent
         elif any(word in user_lower for word in ["wifi", "wi-fi", "internet", "online", "connect"]):
             intent = "wifi"
+        # Lounge access intent
+        elif "lounge" in user_lower:
+            intent = "lounge_access"
         # Cancellation intent
         elif (any(word in user_lower for word in ["cancel", "cancellation", "refund"]) or
               any(phrase in user_lower for phrase in ["don't need", "do not need", "no longer need", "not needed", "dont need"]) or
@@ -71,11 +348,10 @@ class AirlineChatbot:
         # Flight status intent (more specific patterns)
         elif (any(word in user_lower for word in ["when", "time", "schedule", "departure", "arrival", "status", "my flight", "flight status", "check"]) or
               any(word in user_lower for word in ["booking", "reference", "ticket", "confirmation", "pnr", "flight number"]) or
-              re.search(r'\b[A-Z]{2,3}\d{3,4}\b', user_input)):  # Direct flight number detection
+              utterance.flight_number):  # Direct flight number detection
             intent = "check_status"
         # General help
         elif any(word in user_lower for word in ["help", "assistance", "support"]):
             intent = "general"
 
-        # Use enhanced AI-powered dynamic response generator with large dataset
-        return self.enhanced_ai_generator.generate_response(intent, user_input)
+        return intent
@@ -0,0 +1,96 @@
+import os
+import threading
+
+class DatasetReloader:
+    """Watches the dataset files and reloads the chatbot off the request path"""
+
+    def __init__(self, bot, interval=2.0):
+        self.bot = bot
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        # file -> the part of AirlineChatbot.reload() it feeds, so an edit only rebuilds what it touches
+        self.actions = {
+            bot.enhanced_ai_generator.responses_file: "responses",
+            bot.policy_file: "policies",
+            bot.intents_file: "intents",
+        }
+        self._mtimes = {path: self._mtime(path) for path in self.actions}
+
+        self.reload_count = 0
+        self.last_result = None
+        self.last_error = None
+
+    @staticmethod
+    def _mtime(path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _run(self, parts):
+        """Reload the given parts in one all-or-nothing bot.reload(); only one reload is ever in progress"""
+        with self._lock:
+            try:
+                result = self.bot.reload(**{part: part in parts for part in ("responses", "policies", "intents")})
+            except Exception as e:
+                # Keep serving the previous state if the new files are broken
+                self.last_error = str(e)
+                print(f"❌ Dataset reload failed: {e}")
+                return None
+            self.reload_count += 1
+            self.last_result = result
+            self.last_error = None
+            print(f"✅ Datasets reloaded: {result}")
+            return result
+
+    def trigger(self, wait=False):
+        """Reload everything; runs in a background thread unless wait=True"""
+        parts = set(self.actions.values())
+        if wait:
+            return self._run(parts)
+        threading.Thread(target=self._run, args=(parts,), daemon=True).start()
+        return None
+
+    def check(self):
+        """Reload whichever files changed since the last successful reload"""
+        changed = {}
+        for path, part in self.actions.items():
+            mtime = self._mtime(path)
+            if mtime is not None and mtime != self._mtimes.get(path):
+                changed[path] = mtime
+        if not changed:
+            return None
+        result = self._run({self.actions[path] for path in changed})
+        if result is not None:
+            # Only now: a failed reload is retried on the next check
+            self._mtimes.update(changed)
+        return result
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def start(self):
+        """Start polling the dataset files in a daemon thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="dataset-reloader", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval + 1)
+            self._thread = None
+
+    def status(self):
+        return {
+            "watching": self._thread is not None,
+            "reloading": self._lock.locked(),
+            "reload_count": self.reload_count,
+            "last_result": self.last_result,
+            "last_error": self.last_error,
+        }
@@ -1,26 +1,54 @@
-import json
 import random
 import re
 from datetime import datetime, timedelta
 from collections import defaultdict
+from itertools import accumulate
+from app.utterance import Utterance, CITIES, extract_booking_info, extract_destination
+from app.flight_data import FlightDataUnavailable
+from app.response_dataset import iter_records
+
+class ResponsePool:
+    """Distinct responses for one intent, drawn in proportion to how often each appears in the dataset"""
+
+    __slots__ = ("responses", "cum_weights")
+
+    def __init__(self, counts):
+        self.responses = list(counts)
+        self.cum_weights = list(accumulate(counts.values()))
+
+    def __len__(self):
+        return len(self.responses)
+
+    def choice(self):
+        return random.choices(self.responses, cum_weights=self.cum_weights)[0]
+
+class ResponseTables:
+    """One immutable generation of the response tables; a reload swaps in a whole new one"""
+
+    __slots__ = ("intent_responses", "response_tones", "record_count")
+
+    def __init__(self, intent_responses, response_tones, record_count):
+        setattr_ = object.__setattr__
+        setattr_(self, "intent_responses", intent_responses)
+        setattr_(self, "response_tones", response_tones)
+        setattr_(self, "record_count", record_count)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ResponseTables is immutable")
 
 class EnhancedAIResponseGenerator:
-    def __init__(self, responses_file="app/responses.json"):
-        with open(responses_file, "r") as f:
-            self.responses_data = json.load(f)
-        
-        # Build intent mapping from the dataset
-        self.intent_responses = defaultdict(list)
-        self.tone_responses = defaultdict(list)
-        self.policy_responses = defaultdict(list)
+    def __init__(self, responses_file="app/responses.json", flight_data=None):
+        self.responses_file = responses_file
+        # Live flight data provider; None keeps the made-up status details
+        self.flight_data = flight_data
         
-        # Process the dataset
-        self._process_dataset()
+        # Build intent mapping from the dataset (records are streamed, not kept)
+        self.tables = self._build_tables(iter_records(responses_file))
         
         # Real-world data patterns
         self.airports = {
             "major": ["JFK", "LAX", "LHR", "CDG", "NRT", "DXB", "SIN", "HKG"],
-            "cities": ["New York", "Los Angeles", "London", "Paris", "Tokyo", "Dubai", "Singapore", "Hong Kong"],
+            "cities": list(CITIES),
             "countries": ["USA", "UK", "France", "Japan", "UAE", "Singapore", "China"]
         }
         
@@ -36,97 +64,127 @@ class EnhancedAIResponseGenerator:
         # Flight status patterns
         self.statuses = ["On Time", "Delayed", "Boarding", "Departed", "Arrived", "Cancelled"]
         
-    def _process_dataset(self):
-        """Process the responses dataset to build intent, tone, and policy mappings"""
-        for entry in self.responses_data:
+    # Single-table readers; anything that needs two tables should take self.tables once
+    @property
+    def intent_responses(self):
+        return self.tables.intent_responses
+
+    @property
+    def response_tones(self):
+        return self.tables.response_tones
+
+    @property
+    def record_count(self):
+        return self.tables.record_count
+    
+    @staticmethod
+    def _build_tables(records):
+        """Build fresh intent and tone tables without touching the live ones
+
+        Records can be a stream; each one is dropped once indexed. Each intent keeps every
+        distinct response once with its row count, so memory grows with distinct responses,
+        not with rows, and sampling by count keeps the dataset's response frequencies.
+        """
+        counts = defaultdict(dict)
+        response_tones = {}
+        tones = {}
+        count = 0
+
+        for entry in records:
             intent = entry.get("intent", "General")
-            tone = entry.get("tone", "Formal")
-            policy = entry.get("policy_reference", "General")
             response = entry.get("bot_response", "")
-            
-            self.intent_responses[intent].append({
-                "response": response,
-                "tone": tone,
-                "policy": policy
-            })
-            
-            self.tone_responses[tone].append(response)
-            self.policy_responses[policy].append(response)
+            intent_counts = counts[intent]
+            intent_counts[response] = intent_counts.get(response, 0) + 1
+            tone = entry.get("tone", "Formal")
+            response_tones[response] = tones.setdefault(tone, tone)
+            count += 1
+
+        intent_responses = {intent: ResponsePool(intent_counts) for intent, intent_counts in counts.items()}
+        return ResponseTables(intent_responses, response_tones, count)
+
+    def load_tables(self, responses_file=None):
+        """Build new response tables off to the side; requests keep using the old ones meanwhile"""
+        responses_file = responses_file or self.responses_file
+        return responses_file, self._build_tables(iter_records(responses_file))
+    
+    def install_tables(self, loaded):
+        """Swap in tables from load_tables"""
+        responses_file, tables = loaded
+        # One reference assignment: a reader sees either the old tables or the new ones, never a mix
+        self.tables = tables
+        self.responses_file = responses_file
+        return tables.record_count
+    
+    def reload(self, responses_file=None):
+        """Rebuild the response tables from disk and swap them in atomically"""
+        return self.install_tables(self.load_tables(responses_file))
+    
+    # Our intents -> dataset intents (cancellations map to Change Flight since the dataset has no Cancellation intent)
+    DATASET_INTENTS = {
+        "check_status": "Flight Status",
+        "book_flight": "Booking",
+        "cancel_flight": "Change Flight",
+        "pet_policy": "Pet Travel",
+        "baggage_policy": "Damaged Bag",
+        "seat_selection": "Seat Availability",
+        "fare_inquiry": "Fare Check",
+        "change_flight": "Change Flight",
+    }
     
     def generate_response(self, intent, user_input, context=None):
         """Generate enhanced dynamic responses using the dataset"""
-        user_lower = user_input.lower()
+        utterance = Utterance.of(user_input)
+        
+        # Take one reference so a concurrent reload can't swap tables mid-request
+        intent_responses = self.tables.intent_responses
+        
+        # Status questions with a flight number or PNR get live data when a provider is configured
+        if intent == "check_status" and utterance.booking_info and self.flight_data is not None:
+            return self._live_status_response(utterance.booking_info)
         
         # Map our intents to dataset intents
-        dataset_intent = self._map_to_dataset_intent(intent, user_input)
+        dataset_intent = self._map_to_dataset_intent(intent, utterance)
         
         # Get response from dataset or generate dynamic one
-        if dataset_intent in self.intent_responses:
-            return self._get_dataset_response(dataset_intent, user_input, user_lower)
+        if dataset_intent in intent_responses:
+            return self._get_dataset_response(dataset_intent, utterance, intent_responses)
         else:
-            return self._generate_dynamic_response(intent, user_input, user_lower)
+            return self._generate_dynamic_response(intent, utterance)
     
-    def _map_to_dataset_intent(self, intent, user_input):
+    def _map_to_dataset_intent(self, intent, user_input=None):
         """Map our intents to dataset intents"""
-        user_lower = user_input.lower()
-        
-        if intent == "check_status":
-            if any(word in user_lower for word in ["status", "on time", "delayed", "departure"]):
-                return "Flight Status"
-            elif any(word in user_lower for word in ["booking", "reference", "ticket", "confirmation"]):
-                return "Flight Status"
-            else:
-                return "Flight Status"
-        elif intent == "book_flight":
-            return "Booking"
-        elif intent == "cancel_flight":
-            # Map to Change Flight since dataset doesn't have Cancellation intent
-            return "Change Flight"
-        elif intent == "pet_policy":
-            return "Pet Travel"
-        elif intent == "baggage_policy":
-            return "Damaged Bag"
-        elif intent == "seat_selection":
-            return "Seat Availability"
-        elif intent == "fare_inquiry":
-            return "Fare Check"
-        elif intent == "change_flight":
-            return "Change Flight"
-        elif intent == "check_in":
-            return "General"
-        elif intent == "meals":
-            return "General"
-        elif intent == "wifi":
-            return "General"
-        else:
-            return "General"
+        return self.DATASET_INTENTS.get(intent, "General")
     
-    def _get_dataset_response(self, dataset_intent, user_input, user_lower):
+    def _get_dataset_response(self, dataset_intent, utterance, intent_responses=None):
         """Get response from the dataset with dynamic modifications"""
-        available_responses = self.intent_responses[dataset_intent]
+        if intent_responses is None:
+            intent_responses = self.intent_responses
+        available_responses = intent_responses[dataset_intent]
         
         if not available_responses:
-            return self._generate_dynamic_response("general", user_input, user_lower)
+            return self._generate_dynamic_response("general", utterance)
         
         # For cancellation intent, use custom logic instead of dataset
-        if dataset_intent == "Change Flight" and any(phrase in user_lower for phrase in ["dont need", "do not need", "no longer need", "not needed", "dont want"]):
-            return self._generate_dynamic_response("cancel_flight", user_input, user_lower)
+        if dataset_intent == "Change Flight" and any(phrase in utterance.lower for phrase in ["dont need", "do not need", "no longer need", "not needed", "dont want"]):
+            return self._generate_dynamic_response("cancel_flight", utterance)
         
-        # Select a base response
-        base_response = random.choice(available_responses)
-        response_text = base_response["response"]
+        # Select a base response, weighted by how often it occurs in the dataset
+        response_text = available_responses.choice()
         
         # Enhance with dynamic content
-        enhanced_response = self._enhance_response(response_text, user_input, user_lower)
+        enhanced_response = self._enhance_response(response_text, utterance)
         
         return enhanced_response
     
-    def _enhance_response(self, response, user_input, user_lower):
+    def _enhance_response(self, response, utterance):
         """Enhance dataset responses with dynamic content"""
-        # Extract booking info if present
-        booking_info = self._extract_booking_info(user_input)
+        user_lower = utterance.lower
+        booking_info = utterance.booking_info
         
-        if booking_info and "flight" in user_lower:
+        if booking_info and "flight" in user_lower and self.flight_data is not None:
+            if "status" in user_lower or "on time" in user_lower:
+                return self._live_status_response(booking_info)
+        elif booking_info and "flight" in user_lower:
             # Add specific flight details
             flight_number = f"{random.choice(['AA', 'DL', 'UA', 'BA'])}{random.randint(100, 9999)}"
             departure_time = self._generate_realistic_time()
@@ -144,7 +202,7 @@ class EnhancedAIResponseGenerator:
                     return f"Your flight {flight_number} status: {status}. Departure: {departure_time} from {gate} in {terminal}."
         
         # Extract destination if mentioned
-        destination = self._extract_destination(user_input)
+        destination = utterance.destination
         if destination and "book" in user_lower:
             flight_time = self._generate_realistic_time()
             price = self._generate_dynamic_price(destination)
@@ -153,7 +211,7 @@ class EnhancedAIResponseGenerator:
             return f"Excellent choice! I found a great option for {destination}. {airline} has a flight departing at {flight_time} for ${price}. Would you like me to proceed with this booking?"
         
         # Return enhanced base response
-        return self._add_dynamic_elements(response, user_input)
+        return self._add_dynamic_elements(response, utterance.text)
     
     def _add_dynamic_elements(self, response, user_input):
         """Add dynamic elements to base responses"""
@@ -164,22 +222,24 @@ class EnhancedAIResponseGenerator:
         
         return response
     
-    def _generate_dynamic_response(self, intent, user_input, user_lower):
+    def _generate_dynamic_response(self, intent, utterance):
         """Generate completely dynamic responses when dataset doesn't have specific intent"""
         if intent == "check_status":
-            return self._generate_flight_status_response(user_input, user_lower)
+            return self._generate_flight_status_response(utterance)
         elif intent == "book_flight":
-            return self._generate_booking_response(user_input, user_lower)
+            return self._generate_booking_response(utterance)
         elif intent == "cancel_flight":
-            return self._generate_cancellation_response(user_input, user_lower)
+            return self._generate_cancellation_response(utterance)
         else:
-            return self._generate_general_response(user_input, user_lower)
+            return self._generate_general_response(utterance)
     
-    def _generate_flight_status_response(self, user_input, user_lower):
+    def _generate_flight_status_response(self, utterance):
         """Generate dynamic flight status responses"""
-        booking_info = self._extract_booking_info(user_input)
+        booking_info = utterance.booking_info
         
-        if booking_info:
+        if booking_info and self.flight_data is not None:
+            return self._live_status_response(booking_info)
+        elif booking_info:
             # Use the extracted flight number if it looks like a flight number
             if re.match(r'^[A-Z]{2,3}\d{3,4}$', booking_info):
                 flight_number = booking_info
@@ -206,9 +266,36 @@ class EnhancedAIResponseGenerator:
             booking_type = random.choice(booking_types)
             return f"I'd be happy to help you check your flight status. To look up your flight details, I'll need your {booking_type}. Could you please provide that information?"
     
-    def _generate_booking_response(self, user_input, user_lower):
+    def _live_status_response(self, booking_info):
+        """Flight status from the flight data provider"""
+        try:
+            flight = self.flight_data.lookup(booking_info)
+        except FlightDataUnavailable:
+            return f"I'm unable to retrieve live details for {booking_info} right now. Please try again in a few minutes or check the departures board at the airport."
+        
+        if flight is None:
+            return f"I couldn't find a flight or booking matching {booking_info}. Could you please double-check the flight number or booking reference?"
+        
+        flight_number = flight["flight_number"]
+        status = flight["status"]
+        departure_time = flight["departure_time"]
+        gate = f"Gate {flight['gate']}"
+        terminal = f"Terminal {flight['terminal']}"
+        
+        if status == "On Time":
+            return f"Great news! Your flight {flight_number} is on time and scheduled to depart at {departure_time} from {gate} in {terminal}. Please arrive at the airport 2 hours before departure."
+        elif status == "Delayed":
+            return f"I'm sorry to inform you that flight {flight_number} has been delayed by {flight['delay_minutes']} minutes. The new departure time is {departure_time}. We apologize for any inconvenience."
+        elif status == "Boarding":
+            return f"Flight {flight_number} is now boarding! Please proceed to {gate} in {terminal}. The flight will depart at {departure_time}."
+        elif flight.get("arrival_time"):
+            return f"Your flight {flight_number} status: {status}. Departure: {departure_time}, Arrival: {flight['arrival_time']} from {gate} in {terminal}."
+        else:
+            return f"Your flight {flight_number} status: {status}. Departure: {departure_time} from {gate} in {terminal}."
+    
+    def _generate_booking_response(self, utterance):
         """Generate dynamic booking responses"""
-        destination = self._extract_destination(user_input)
+        destination = utterance.destination
         
         if destination:
             airline = random.choice(self.airlines)
@@ -221,9 +308,10 @@ class EnhancedAIResponseGenerator:
             destinations = random.sample(self.airports["cities"], 3)
             return f"I'd be delighted to help you book a flight! Could you please tell me your destination? Popular destinations include {', '.join(destinations)}. Also, what's your preferred travel date?"
     
-    def _generate_cancellation_response(self, user_input, user_lower):
+    def _generate_cancellation_response(self, utterance):
         """Generate dynamic cancellation responses"""
-        booking_info = self._extract_booking_info(user_input)
+        user_lower = utterance.lower
+        booking_info = utterance.booking_info
         
         # Check if user is declining/not needing a flight
         if any(phrase in user_lower for phrase in ["dont need", "do not need", "no longer need", "not needed", "dont want"]):
@@ -243,8 +331,9 @@ class EnhancedAIResponseGenerator:
             booking_type = random.choice(booking_types)
             return f"I understand you'd like to cancel your flight. To process your cancellation, I'll need your {booking_type}. Could you please provide that information?"
     
-    def _generate_general_response(self, user_input, user_lower):
+    def _generate_general_response(self, utterance):
         """Generate dynamic general responses"""
+        user_lower = utterance.lower
         if any(word in user_lower for word in ["hello", "hi", "hey", "good morning", "good afternoon"]):
             greetings = ["Hello! Welcome to our airline service.", "Hi there! How can I assist you today?", "Good day! I'm here to help with your travel needs."]
             return random.choice(greetings)
@@ -260,28 +349,11 @@ class EnhancedAIResponseGenerator:
     
     def _extract_booking_info(self, user_input):
         """Extract booking information from user input"""
-        patterns = [
-            r'booking\s+(?:reference|ref|number|id)\s*:?\s*([A-Z0-9]+)',
-            r'confirmation\s+(?:number|id)\s*:?\s*([A-Z0-9]+)',
-            r'ticket\s+(?:number|id)\s*:?\s*([A-Z0-9]+)',
-            r'pnr\s*:?\s*([A-Z0-9]+)',
-            r'flight\s+(?:number|no)\s*:?\s*([A-Z0-9]+)',
-            r'\b([A-Z]{2,3}\d{3,4})\b',  # Flight number pattern (2-3 letters + 3-4 digits) - matches UA1033
-            r'\b([A-Z]{1,3}\d{3,6})\b',  # Alternative flight number pattern
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, user_input, re.IGNORECASE)
-            if match:
-                return match.group(1)
-        return None
+        return extract_booking_info(user_input)
     
     def _extract_destination(self, user_input):
         """Extract destination from user input"""
-        for city in self.airports["cities"]:
-            if city.lower() in user_input.lower():
-                return city
-        return None
+        return extract_destination(user_input.lower())
     
     def _generate_realistic_time(self, base_time=None):
         """Generate realistic flight times"""
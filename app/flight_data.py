@@ -0,0 +1,188 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict
+
+class FlightDataUnavailable(Exception):
+    """The flight data backend could not answer (timeout, error or open circuit)"""
+
+class FlightDataProvider:
+    """Interface for live flight data; keys are flight numbers or PNRs"""
+
+    async def get_status(self, key):
+        """Return a status dict, or None if the flight/booking is unknown"""
+        raise NotImplementedError
+
+    def lookup(self, key, timeout=None):
+        """Synchronous wrapper for the request path"""
+        return asyncio.run(self.get_status(key))
+
+    def close(self):
+        pass
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one trial call through after reset_timeout"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.opens = 0
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self):
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half_open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        self.trial_in_flight = False
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                self.opens += 1
+            self.opened_at = time.monotonic()
+
+class HTTPFlightDataProvider(FlightDataProvider):
+    """Pooled async HTTP client with TTL cache, request coalescing, timeouts and a circuit breaker"""
+
+    def __init__(self, base_url, max_connections=20, timeout=0.5, ttl=30.0, negative_ttl=5.0,
+                 cache_size=10000, failure_threshold=5, reset_timeout=30.0):
+        import httpx
+
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache_size = cache_size
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+
+        self._cache = OrderedDict()  # key -> (expires_at, status or None)
+        self._inflight = {}          # key -> asyncio.Task
+
+        self.requests = 0
+        self.cache_hits = 0
+        self.coalesced = 0
+        self.backend_calls = 0
+        self.failures = 0
+        self.rejected = 0
+
+        # The client and every coroutine live on one background event loop
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="flight-data", daemon=True)
+        self._thread.start()
+        self._client = asyncio.run_coroutine_threadsafe(self._make_client(httpx, max_connections), self._loop).result()
+
+    async def _make_client(self, httpx, max_connections):
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=httpx.Timeout(self.timeout)
+        )
+
+    @staticmethod
+    def _normalize(key):
+        return key.strip().upper()
+
+    def _cached(self, key):
+        hit = self._cache.get(key)
+        if hit is None:
+            return False, None
+        expires_at, value = hit
+        if expires_at < time.monotonic():
+            del self._cache[key]
+            return False, None
+        self._cache.move_to_end(key)
+        return True, value
+
+    def _store(self, key, value):
+        ttl = self.ttl if value is not None else self.negative_ttl
+        self._cache[key] = (time.monotonic() + ttl, value)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def _fetch(self, key):
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise FlightDataUnavailable("circuit open")
+        self.backend_calls += 1
+        try:
+            response = await self._client.get(f"/flights/{key}")
+            if response.status_code == 404:
+                value = None
+            else:
+                response.raise_for_status()
+                value = response.json()
+        except Exception as e:
+            self.failures += 1
+            self.breaker.record_failure()
+            raise FlightDataUnavailable(str(e) or e.__class__.__name__) from e
+        self.breaker.record_success()
+        self._store(key, value)
+        return value
+
+    async def get_status(self, key):
+        key = self._normalize(key)
+        self.requests += 1
+        found, value = self._cached(key)
+        if found:
+            self.cache_hits += 1
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(key))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _, key=key: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shield so one caller giving up doesn't cancel the fetch the others are waiting on
+        return await asyncio.shield(task)
+
+    def lookup(self, key, timeout=None):
+        """Block the calling thread for at most timeout seconds (default: the HTTP timeout plus slack)"""
+        future = asyncio.run_coroutine_threadsafe(self.get_status(key), self._loop)
+        try:
+            return future.result(timeout if timeout is not None else self.timeout + 0.1)
+        except FlightDataUnavailable:
+            raise
+        except Exception as e:
+            future.cancel()
+            raise FlightDataUnavailable(str(e) or e.__class__.__name__) from e
+
+    def close(self):
+        asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+    def stats(self):
+        return {
+            "requests": self.requests,
+            "cache_hits": self.cache_hits,
+            "coalesced": self.coalesced,
+            "backend_calls": self.backend_calls,
+            "failures": self.failures,
+            "rejected_by_breaker": self.rejected,
+            "breaker_state": self.breaker.state,
+            "breaker_opens": self.breaker.opens,
+            "cached_keys": len(self._cache),
+        }
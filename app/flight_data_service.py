@@ -0,0 +1,97 @@
+"""
+Local stand-in for the operations flight-data system
+Serves GET /flights/{flight_number_or_pnr} from an indexed schedule file
+
+    python -m app.flight_data_service --generate 5000     # write data/flight_schedule.json
+    uvicorn app.flight_data_service:app --port 8100       # serve it
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+from fastapi import FastAPI, HTTPException
+
+SCHEDULE_FILE = os.getenv("ASAAP_FLIGHT_SCHEDULE", "data/flight_schedule.json")
+
+class FlightSchedule:
+    """Schedule records indexed by flight number and by PNR"""
+
+    def __init__(self, path=SCHEDULE_FILE):
+        with open(path) as f:
+            records = json.load(f)
+        self.by_flight = {}
+        self.by_pnr = {}
+        for record in records:
+            self.by_flight[record["flight_number"].upper()] = record
+            for pnr in record.get("pnrs", []):
+                self.by_pnr[pnr.upper()] = record
+
+    def find(self, key):
+        key = key.strip().upper()
+        return self.by_flight.get(key) or self.by_pnr.get(key)
+
+def generate_schedule(count, seed=42):
+    """Deterministic synthetic schedule for load tests"""
+    rng = random.Random(seed)
+    airports = ["JFK", "LAX", "LHR", "CDG", "NRT", "DXB", "SIN", "HKG"]
+    statuses = ["On Time"] * 6 + ["Delayed"] * 2 + ["Boarding", "Departed", "Arrived", "Cancelled"]
+    alphabet = "ABCDEFGHJKLMNPQRSTUVWXYZ23456789"
+    records = []
+    seen = set()
+    while len(records) < count:
+        flight_number = f"{rng.choice(['AA', 'DL', 'UA', 'BA'])}{rng.randint(100, 9999)}"
+        if flight_number in seen:
+            continue
+        seen.add(flight_number)
+        origin, destination = rng.sample(airports, 2)
+        dep_hour, dep_minute = rng.randint(6, 22), rng.choice([0, 15, 30, 45])
+        arr_hour, arr_minute = (dep_hour + rng.randint(1, 14)) % 24, rng.randint(0, 59)
+        status = rng.choice(statuses)
+        records.append({
+            "flight_number": flight_number,
+            "pnrs": ["".join(rng.choice(alphabet) for _ in range(6)) for _ in range(rng.randint(1, 4))],
+            "origin": origin,
+            "destination": destination,
+            "departure_time": f"{dep_hour % 12 or 12}:{dep_minute:02d} {'AM' if dep_hour < 12 else 'PM'}",
+            "arrival_time": f"{arr_hour % 12 or 12}:{arr_minute:02d} {'AM' if arr_hour < 12 else 'PM'}",
+            "gate": f"{rng.choice('ABCD')}{rng.randint(1, 50)}",
+            "terminal": str(rng.randint(1, 5)),
+            "status": status,
+            "delay_minutes": rng.randint(15, 120) if status == "Delayed" else 0,
+        })
+    return records
+
+app = FastAPI()
+schedule = None
+LATENCY_MS = float(os.getenv("ASAAP_FLIGHT_SERVICE_LATENCY_MS", "0"))
+
+@app.on_event("startup")
+def load_schedule():
+    global schedule
+    schedule = FlightSchedule(SCHEDULE_FILE)
+
+@app.get("/flights/{key}")
+def flight(key: str):
+    if LATENCY_MS:
+        time.sleep(LATENCY_MS / 1000)  # simulate the slow upstream; sync route runs in the threadpool
+    record = schedule.find(key)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Unknown flight or booking: {key}")
+    return {k: v for k, v in record.items() if k != "pnrs"}
+
+def main():
+    parser = argparse.ArgumentParser(description="ASAAP flight data stand-in")
+    parser.add_argument("--generate", type=int, metavar="N", help="Write a synthetic schedule with N flights")
+    parser.add_argument("--output", default=SCHEDULE_FILE, help="Schedule file to write")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    if args.generate:
+        with open(args.output, "w") as f:
+            json.dump(generate_schedule(args.generate, args.seed), f, indent=1)
+        print(f"✅ Wrote {args.generate} flights to {args.output}")
+
+if __name__ == "__main__":
+    main()
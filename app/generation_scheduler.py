@@ -0,0 +1,247 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import torch
+
+class _Sequence:
+    """One prompt being decoded by the scheduler"""
+
+    __slots__ = ("future", "prompt_ids", "generated", "max_new_tokens", "submitted_at")
+
+    def __init__(self, future, prompt_ids, max_new_tokens):
+        self.future = future
+        self.prompt_ids = prompt_ids
+        self.generated = []
+        self.max_new_tokens = max_new_tokens
+        self.submitted_at = time.perf_counter()
+
+class GenerationScheduler:
+    """Continuous batching for a causal LM: sequences join and leave the batch between decode steps"""
+
+    def __init__(self, model, tokenizer, max_batch_size=8, max_queue_wait_ms=10, max_new_tokens=30,
+                 temperature=0.3, stop_strings=("\n", "User:")):
+        self.model = model.eval()
+        self.tokenizer = tokenizer
+        self.max_batch_size = max_batch_size
+        self.max_queue_wait_ms = max_queue_wait_ms
+        self.max_new_tokens = max_new_tokens
+        self.temperature = temperature
+        self.stop_strings = stop_strings
+        self.eos_token_id = tokenizer.eos_token_id
+        self.pad_token_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+        self.max_positions = getattr(model.config, "n_positions", 1024)
+        self.device = next(model.parameters()).device
+
+        self._queue = queue.Queue()
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+        self.admitted = 0
+        self.completed = 0
+        self.generated_tokens = 0
+        self.busy_seconds = 0.0
+        self.decode_steps = 0
+        self.prefills = 0
+        self.batch_size_total = 0
+        self.queue_wait_total_ms = 0.0
+        self.queue_wait_max_ms = 0.0
+
+        self._thread = threading.Thread(target=self._loop, name="generation-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, prompt, max_new_tokens=None):
+        """Queue a prompt; the Future resolves to prompt + generated text"""
+        max_new_tokens = max_new_tokens or self.max_new_tokens
+        prompt_ids = self.tokenizer.encode(prompt)
+        # Keep room for the new tokens inside the model's context window
+        prompt_ids = prompt_ids[-(self.max_positions - max_new_tokens):]
+        future = Future()
+        self._queue.put(_Sequence(future, prompt_ids, max_new_tokens))
+        return future
+
+    def generate(self, prompt, max_new_tokens=None, timeout=None):
+        return self.submit(prompt, max_new_tokens).result(timeout)
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    def _admit(self, active):
+        """Pull queued sequences into the batch; returns the newly joined ones"""
+        joined = []
+        if not active:
+            # Idle: block for the first request, then give others a short window to join
+            try:
+                joined.append(self._queue.get(timeout=0.1))
+            except queue.Empty:
+                return joined
+            deadline = time.perf_counter() + self.max_queue_wait_ms / 1000
+            while len(joined) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    joined.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+        while len(active) + len(joined) < self.max_batch_size:
+            try:
+                joined.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if joined:
+            active.extend(joined)
+            now = time.perf_counter()
+            with self._lock:
+                for seq in joined:
+                    self.admitted += 1
+                    wait_ms = (now - seq.submitted_at) * 1000
+                    self.queue_wait_total_ms += wait_ms
+                    self.queue_wait_max_ms = max(self.queue_wait_max_ms, wait_ms)
+        return joined
+
+    def _prefill(self, active):
+        """Run the given sequences as one left-padded batch and start a fresh KV cache for them"""
+        rows = [seq.prompt_ids + seq.generated for seq in active]
+        width = max(len(row) for row in rows)
+        input_ids = torch.full((len(rows), width), self.pad_token_id, dtype=torch.long)
+        attention_mask = torch.zeros((len(rows), width), dtype=torch.long)
+        for i, row in enumerate(rows):
+            input_ids[i, width - len(row):] = torch.tensor(row, dtype=torch.long)
+            attention_mask[i, width - len(row):] = 1
+        position_ids = (attention_mask.cumsum(-1) - 1).clamp(min=0)
+        outputs = self.model(
+            input_ids=input_ids.to(self.device),
+            attention_mask=attention_mask.to(self.device),
+            position_ids=position_ids.to(self.device),
+            use_cache=True
+        )
+        self.prefills += 1
+        return outputs, attention_mask
+
+    @staticmethod
+    def _merge_cache(cache, attention_mask, joined_cache, joined_mask):
+        """Append the joined rows to the running cache, left-padding whichever is shorter"""
+        width = max(attention_mask.shape[1], joined_mask.shape[1])
+
+        def pad(states):  # (batch, heads, seq, head_dim): zeros in front of the seq dim
+            return torch.nn.functional.pad(states, (0, 0, width - states.shape[-2], 0))
+
+        for layer, joined_layer in zip(cache.layers, joined_cache.layers):
+            layer.keys = torch.cat([pad(layer.keys), pad(joined_layer.keys)])
+            layer.values = torch.cat([pad(layer.values), pad(joined_layer.values)])
+        return torch.cat([torch.nn.functional.pad(mask, (width - mask.shape[1], 0))
+                          for mask in (attention_mask, joined_mask)])
+
+    def _decode(self, active, past_key_values, attention_mask):
+        """Feed each sequence's last token through the cached batch"""
+        input_ids = torch.tensor([[seq.generated[-1]] for seq in active], dtype=torch.long)
+        attention_mask = torch.cat([attention_mask, torch.ones((len(active), 1), dtype=torch.long)], dim=-1)
+        position_ids = attention_mask.sum(-1, keepdim=True) - 1
+        outputs = self.model(
+            input_ids=input_ids.to(self.device),
+            attention_mask=attention_mask.to(self.device),
+            position_ids=position_ids.to(self.device),
+            past_key_values=past_key_values,
+            use_cache=True
+        )
+        return outputs, attention_mask
+
+    def _sample(self, logits):
+        if self.temperature and self.temperature > 0:
+            probs = torch.softmax(logits.float() / self.temperature, dim=-1)
+            return torch.multinomial(probs, 1).squeeze(-1).tolist()
+        return logits.argmax(-1).tolist()
+
+    def _finished(self, seq):
+        token = seq.generated[-1]
+        if token == self.eos_token_id or len(seq.generated) >= seq.max_new_tokens:
+            return True
+        text = self.tokenizer.decode(seq.generated).lstrip()
+        return any(stop in text for stop in self.stop_strings)
+
+    def _complete(self, seq):
+        generated = seq.generated
+        if generated and generated[-1] == self.eos_token_id:
+            generated = generated[:-1]
+        text = self.tokenizer.decode(seq.prompt_ids + generated)
+        with self._lock:
+            self.completed += 1
+            self.generated_tokens += len(seq.generated)
+        if not seq.future.done():
+            seq.future.set_result(text)
+
+    def _loop(self):
+        active = []
+        past_key_values = None
+        attention_mask = None
+        while not self._stop.is_set():
+            joined = self._admit(active)
+            if not active:
+                continue
+            if joined and past_key_values is not None and not hasattr(past_key_values, "layers"):
+                past_key_values = None  # this cache type can't be extended: prefill the whole batch
+
+            started = time.perf_counter()
+            try:
+                with torch.no_grad():
+                    if past_key_values is None:
+                        outputs, attention_mask = self._prefill(active)
+                        past_key_values, stepped = outputs.past_key_values, active
+                    elif joined:
+                        # Prefill only the newcomers and append their rows to the running cache; the
+                        # running sequences take their next step together with them on the next iteration
+                        outputs, joined_mask = self._prefill(joined)
+                        attention_mask = self._merge_cache(past_key_values, attention_mask,
+                                                           outputs.past_key_values, joined_mask)
+                        stepped = joined
+                    else:
+                        outputs, attention_mask = self._decode(active, past_key_values, attention_mask)
+                        past_key_values, stepped = outputs.past_key_values, active
+                    tokens = self._sample(outputs.logits[:, -1, :])
+
+                for seq, token in zip(stepped, tokens):
+                    seq.generated.append(token)
+                finished = {id(seq) for seq in stepped if self._finished(seq)}
+                keep = [i for i, seq in enumerate(active) if id(seq) not in finished]
+                for seq in active:
+                    if id(seq) in finished:
+                        self._complete(seq)
+                if len(keep) != len(active):
+                    # Finished sequences leave now; drop their cache rows, or re-prefill if the cache can't
+                    if keep and hasattr(past_key_values, "batch_select_indices"):
+                        index = torch.tensor(keep, dtype=torch.long)
+                        past_key_values.batch_select_indices(index.to(self.device))
+                        attention_mask = attention_mask[index]
+                    else:
+                        past_key_values = None
+            except Exception as e:
+                # Fail the whole batch rather than the thread; queued prompts still get served
+                for seq in active:
+                    if not seq.future.done():
+                        seq.future.set_exception(e)
+                active, past_key_values = [], None
+                continue
+            with self._lock:
+                self.decode_steps += 1
+                self.batch_size_total += len(stepped)
+                self.busy_seconds += time.perf_counter() - started
+            active = [active[i] for i in keep]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "completed": self.completed,
+                "queued": self._queue.qsize(),
+                "generated_tokens": self.generated_tokens,
+                "tokens_per_second": round(self.generated_tokens / self.busy_seconds, 2) if self.busy_seconds else 0.0,
+                "avg_batch_size": round(self.batch_size_total / self.decode_steps, 2) if self.decode_steps else 0.0,
+                "avg_queue_wait_ms": round(self.queue_wait_total_ms / self.admitted, 2) if self.admitted else 0.0,
+                "max_queue_wait_ms": round(self.queue_wait_max_ms, 2),
+                "decode_steps": self.decode_steps,
+                "prefills": self.prefills,
+                "max_batch_size": self.max_batch_size,
+                "max_queue_wait_ms_target": self.max_queue_wait_ms,
+            }
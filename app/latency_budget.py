@@ -0,0 +1,114 @@
+import threading
+import time
+
+# Degradation path, cheapest last: each level drops the next most expensive stage
+DEGRADATION_LEVELS = ("full", "no_search", "keyword_only", "policy_fallback")
+
+# Starting estimates until real requests have been observed
+DEFAULT_STAGE_MS = {"embed": 25.0, "search": 10.0, "generate": 5.0}
+
+class Deadline:
+    """Absolute deadline for one request, measured from its arrival"""
+
+    def __init__(self, budget_ms, started=None):
+        self.budget_ms = budget_ms
+        self.at = (time.perf_counter() if started is None else started) + budget_ms / 1000
+
+    @classmethod
+    def from_budget(cls, value, default_ms=None, started=None):
+        """Deadline from a header/field value, else the default; None or <= 0 means no budget"""
+        try:
+            budget_ms = float(value) if value not in (None, "") else default_ms
+        except (TypeError, ValueError):
+            budget_ms = default_ms
+        if budget_ms is None or budget_ms <= 0:
+            return None
+        return cls(budget_ms, started)
+
+    def remaining_ms(self):
+        return (self.at - time.perf_counter()) * 1000
+
+    def allows(self, cost_ms):
+        return self.remaining_ms() >= cost_ms
+
+class StageCosts:
+    """Running per-stage latency estimates (EWMA of mean and deviation) and degradation counts
+
+    A stage is only measured when it runs, so a spike could keep it skipped indefinitely.
+    Two things bring it back: the excess over the starting estimate decays with half_life_s
+    while a stage goes unobserved, and after probe_every consecutive skips one request runs
+    the stage anyway (possibly over its budget) to refresh the estimate.
+    """
+
+    def __init__(self, alpha=0.2, initial=None, half_life_s=5.0, probe_every=20, clock=time.monotonic):
+        self.alpha = alpha
+        self.half_life_s = half_life_s
+        self.probe_every = probe_every
+        self._clock = clock
+        self._floor = dict(DEFAULT_STAGE_MS, **(initial or {}))
+        self._mean = dict(self._floor)
+        self._dev = {stage: ms / 2 for stage, ms in self._mean.items()}
+        self._observed_at = {}
+        self._skips = {}
+        self._probes = 0
+        self._served = dict.fromkeys(DEGRADATION_LEVELS, 0)
+        self._lock = threading.Lock()
+
+    def _current(self, stage, now):
+        """(mean, deviation) for the stage, decayed for the time since it was last observed"""
+        mean = self._mean.get(stage)
+        dev = self._dev.get(stage, 0.0)
+        observed_at = self._observed_at.get(stage)
+        if mean is None or observed_at is None:
+            return mean, dev
+        factor = 0.5 ** ((now - observed_at) / self.half_life_s)
+        floor = self._floor.get(stage, 0.0)
+        if mean > floor:
+            mean = floor + (mean - floor) * factor
+        return mean, dev * factor
+
+    def observe(self, stage, ms):
+        with self._lock:
+            now = self._clock()
+            mean, dev = self._current(stage, now)
+            if mean is None:
+                mean = ms
+            self._dev[stage] = (1 - self.alpha) * dev + self.alpha * abs(ms - mean)
+            self._mean[stage] = (1 - self.alpha) * mean + self.alpha * ms
+            self._observed_at[stage] = now
+
+    def estimate(self, *stages):
+        """Pessimistic cost of running the stages: mean plus two deviations each"""
+        now = self._clock()
+        total = 0.0
+        for stage in stages:
+            mean, dev = self._current(stage, now)
+            total += (mean or 0.0) + 2 * dev
+        return total
+
+    def allows(self, deadline, *stages):
+        """Whether to run the stages under the deadline; every probe_every-th consecutive skip runs them"""
+        if deadline is None or deadline.allows(self.estimate(*stages)):
+            with self._lock:
+                self._skips.pop(stages, None)
+            return True
+        with self._lock:
+            skips = self._skips.get(stages, 0) + 1
+            if skips < self.probe_every:
+                self._skips[stages] = skips
+                return False
+            self._skips.pop(stages, None)
+            self._probes += 1
+            return True
+
+    def served(self, level):
+        with self._lock:
+            self._served[level] += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "served": dict(self._served),
+                "probes": self._probes,
+                "stage_estimates_ms": {stage: round(self.estimate(stage), 3) for stage in self._mean},
+            }
@@ -0,0 +1,170 @@
+"""
+Transformer-free intent classifier for lite deployments
+Hashed word/char n-gram features and a linear softmax model stored as NumPy arrays
+
+    python -m app.lite_classifier train       # writes app/models/lite_intent.npz
+    python -m app.lite_classifier evaluate    # accuracy vs labels and vs the full pipeline
+"""
+
+import argparse
+import json
+import re
+import time
+import zlib
+
+import numpy as np
+
+from app.response_dataset import iter_records
+
+MODEL_FILE = "app/models/lite_intent.npz"
+N_FEATURES = 1 << 14
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+# Dataset intents in app/responses.json -> chatbot intents
+DATASET_TO_INTENT = {
+    "Pet Travel": "pet_policy",
+    "Damaged Bag": "baggage_policy",
+    "Seat Availability": "seat_selection",
+    "Fare Check": "fare_inquiry",
+    "Change Flight": "change_flight",
+    "Cancel Trip": "cancel_flight",
+    "Flight Status": "check_status",
+    "Greetings": "general",
+    "Complaints": "complaint",
+    "Thanks": "thanks",
+    "Discounts": "discounts",
+    "Booking": "book_flight",
+}
+
+def features(text, n_features=N_FEATURES):
+    """Hashed feature indices: word unigrams, word bigrams and char trigrams"""
+    words = _WORD.findall(text.lower())
+    grams = ["w:" + w for w in words]
+    grams += ["b:" + a + " " + b for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        grams += ["c:" + padded[i:i + 3] for i in range(len(padded) - 2)]
+    return np.fromiter((zlib.crc32(g.encode()) % n_features for g in grams), dtype=np.int64, count=len(grams))
+
+class LiteIntentClassifier:
+    """Linear intent model: score = sum of weight rows for the message's hashed n-grams"""
+
+    def __init__(self, weights, bias, classes, n_features=N_FEATURES):
+        self.weights = weights
+        self.bias = bias
+        self.classes = list(classes)
+        self.n_features = n_features
+
+    @classmethod
+    def load(cls, path=MODEL_FILE):
+        data = np.load(path)
+        return cls(data["weights"], data["bias"], [str(c) for c in data["classes"]], int(data["n_features"]))
+
+    def save(self, path=MODEL_FILE):
+        np.savez_compressed(path, weights=self.weights, bias=self.bias,
+                            classes=np.array(self.classes), n_features=self.n_features)
+
+    def predict(self, text):
+        """(intent, probability)"""
+        index = features(text, self.n_features)
+        if not len(index):
+            return self.classes[int(self.bias.argmax())], 0.0
+        scores = self.bias + self.weights[index].sum(axis=0) / np.sqrt(len(index))
+        best = int(scores.argmax())
+        exp = np.exp(scores - scores[best])
+        return self.classes[best], float(1.0 / exp.sum())
+
+    @classmethod
+    def train(cls, texts, labels, n_features=N_FEATURES, epochs=500, lr=2.0, l2=1e-4):
+        """Full-batch softmax regression on hashed features"""
+        classes = sorted(set(labels))
+        y = np.array([classes.index(label) for label in labels])
+        x = np.zeros((len(texts), n_features), dtype=np.float32)
+        for row, text in enumerate(texts):
+            index = features(text, n_features)
+            np.add.at(x[row], index, 1.0 / np.sqrt(max(len(index), 1)))
+
+        weights = np.zeros((n_features, len(classes)), dtype=np.float32)
+        bias = np.zeros(len(classes), dtype=np.float32)
+        onehot = np.eye(len(classes), dtype=np.float32)[y]
+        for _ in range(epochs):
+            scores = x @ weights + bias
+            scores -= scores.max(axis=1, keepdims=True)
+            probs = np.exp(scores)
+            probs /= probs.sum(axis=1, keepdims=True)
+            grad = (probs - onehot) / len(texts)
+            weights -= lr * (x.T @ grad + l2 * weights)
+            bias -= lr * grad.sum(axis=0)
+        return cls(weights, bias, classes, n_features)
+
+def load_training_data(intents_file="data/sample_intents.json", responses_file="app/responses.json"):
+    texts, labels = [], []
+    with open(intents_file) as f:
+        for item in json.load(f):
+            for example in item["examples"]:
+                texts.append(example)
+                labels.append(item["intent"])
+    for entry in iter_records(responses_file):
+        intent = DATASET_TO_INTENT.get(entry.get("intent"))
+        if intent:
+            texts.append(entry["customer_message"])
+            labels.append(intent)
+    return texts, labels
+
+def evaluate(folds=5, seed=0):
+    """Cross-validated accuracy of the classifier, the keyword rules and lite routing (rules first)"""
+    from app.chatbot import AirlineChatbot
+    from app.utterance import Utterance
+
+    texts, labels = load_training_data()
+    # Deduplicate so a message can't sit in both train and test folds
+    pairs = list(dict.fromkeys(zip(texts, labels)))
+    order = np.random.default_rng(seed).permutation(len(pairs))
+    keyword_bot = AirlineChatbot(lite=True)
+    correct = {"classifier": 0, "keyword_rules": 0, "lite": 0}
+    for fold in range(folds):
+        test = {int(i) for i in order[fold::folds]}
+        train = [pairs[i] for i in range(len(pairs)) if i not in test]
+        model = LiteIntentClassifier.train([t for t, _ in train], [l for _, l in train])
+        keyword_bot.classifier = model
+        for i in test:
+            text, label = pairs[i]
+            correct["classifier"] += model.predict(text)[0] == label
+            correct["keyword_rules"] += keyword_bot.detect_intent(text) == label
+            correct["lite"] += keyword_bot.classify(Utterance.of(text))[0] == label
+
+    model = LiteIntentClassifier.load()
+    lite = AirlineChatbot(lite=True, classifier=model)
+    # The full pipeline's final intent comes from the keyword rules
+    agree = sum(lite.classify(Utterance.of(t))[0] == lite.detect_intent(t) for t, _ in pairs)
+
+    started = time.perf_counter()
+    for t, _ in pairs * 20:
+        model.predict(t)
+    per_call_us = (time.perf_counter() - started) / (len(pairs) * 20) * 1e6
+
+    return {
+        "examples": len(pairs),
+        "cv_accuracy": {name: round(n / len(pairs), 4) for name, n in correct.items()},
+        "agreement_with_full_pipeline": round(agree / len(pairs), 4),
+        "predict_us": round(per_call_us, 2),
+        "model_bytes": model.weights.nbytes + model.bias.nbytes,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Lite intent classifier")
+    parser.add_argument("command", choices=["train", "evaluate"])
+    parser.add_argument("--output", default=MODEL_FILE)
+    args = parser.parse_args()
+
+    if args.command == "train":
+        texts, labels = load_training_data()
+        model = LiteIntentClassifier.train(texts, labels)
+        model.save(args.output)
+        print(f"✅ Trained on {len(texts)} examples, {len(model.classes)} intents -> {args.output}")
+    else:
+        print(json.dumps(evaluate(), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,308 @@
-from fastapi import FastAPI, Form
+import os
+from urllib.parse import quote
+from fastapi import FastAPI, Form, Header, HTTPException, Response
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 from app.chatbot import AirlineChatbot
+from app.cache_warmer import CacheWarmer
+from app.dataset_reloader import DatasetReloader
+from app.flight_data import HTTPFlightDataProvider
+from app.latency_budget import Deadline
+from app.policy_cache import etag_matches
+from app.request_profiler import RequestProfiler
+from app.rpc import RPCServer
+from app.semantic_cache import SemanticCache
+from app.shared_cache import SharedCache
+from app.single_flight import SingleFlight, coalesce_key
+from app.tenants import TenantRegistry
+from app.transcript_logger import TranscriptLogger
 
 app = FastAPI()
-bot = AirlineChatbot()
+
+# Lite mode: no embedding model, GPT-2 or vector DB; intents come from the n-gram classifier
+LITE = os.getenv("ASAAP_LITE", "0") == "1"
+
+def make_semantic_cache():
+    # The semantic cache is keyed on embeddings, which lite mode doesn't compute
+    if LITE or os.getenv("ASAAP_SEMANTIC_CACHE", "1") != "1":
+        return None
+    return SemanticCache(
+        capacity=int(os.getenv("ASAAP_SEMANTIC_CACHE_SIZE", "1024")),
+        ttl=float(os.getenv("ASAAP_SEMANTIC_CACHE_TTL", "600")),
+        default_threshold=float(os.getenv("ASAAP_SEMANTIC_CACHE_THRESHOLD", "0.9"))
+    )
+
+semantic_cache = make_semantic_cache()
+
+# Live flight status from the operations system (or the local stand-in service)
+flight_data = None
+if os.getenv("ASAAP_FLIGHT_DATA_URL"):
+    flight_data = HTTPFlightDataProvider(
+        os.getenv("ASAAP_FLIGHT_DATA_URL"),
+        max_connections=int(os.getenv("ASAAP_FLIGHT_DATA_CONNECTIONS", "20")),
+        timeout=float(os.getenv("ASAAP_FLIGHT_DATA_TIMEOUT", "0.5")),
+        ttl=float(os.getenv("ASAAP_FLIGHT_DATA_TTL", "30"))
+    )
+
+# Second-level embedding/response cache shared by all nodes (Redis protocol)
+shared_cache = None
+if os.getenv("ASAAP_SHARED_CACHE_URL"):
+    shared_cache = SharedCache.from_url(
+        os.getenv("ASAAP_SHARED_CACHE_URL"),
+        namespace=os.getenv("ASAAP_SHARED_CACHE_NAMESPACE", "asaap"),
+        timeout=float(os.getenv("ASAAP_SHARED_CACHE_TIMEOUT_MS", "20")) / 1000,
+        response_ttl=int(os.getenv("ASAAP_SHARED_CACHE_RESPONSE_TTL", "300"))
+    )
+
+bot = AirlineChatbot(semantic_cache=semantic_cache, flight_data=flight_data, lite=LITE, shared_cache=shared_cache)
+
+# Optional multi-tenant mode: other airline brands share the embedding model
+tenants = None
+if os.getenv("ASAAP_TENANTS_FILE"):
+    tenants = TenantRegistry.from_file(
+        os.getenv("ASAAP_TENANTS_FILE"),
+        bot.model,
+        chroma_client=bot.db.client if bot.db else None,
+        max_bytes=int(os.getenv("ASAAP_TENANT_MAX_MB", "512")) * 1024 * 1024,
+        max_tenants=int(os.getenv("ASAAP_TENANT_MAX_COUNT", "32")),
+        semantic_cache_factory=make_semantic_cache,
+        flight_data=flight_data,
+        lite=LITE,
+        shared_cache=shared_cache
+    )
+
+transcripts = None
+if os.getenv("ASAAP_TRANSCRIPTS", "1") == "1":
+    transcripts = TranscriptLogger(
+        directory=os.getenv("ASAAP_TRANSCRIPT_DIR", "logs/transcripts"),
+        max_queue=int(os.getenv("ASAAP_TRANSCRIPT_QUEUE", "10000")),
+        policy=os.getenv("ASAAP_TRANSCRIPT_POLICY", "drop")
+    )
+reloader = DatasetReloader(bot, interval=float(os.getenv("ASAAP_RELOAD_INTERVAL", "2")))
+
+ADMIN_TOKEN = os.getenv("ASAAP_ADMIN_TOKEN")
+profiler = RequestProfiler(
+    admin_token=ADMIN_TOKEN,
+    sample_rate=float(os.getenv("ASAAP_PROFILE_SAMPLE_RATE", "0")),
+    capacity=int(os.getenv("ASAAP_PROFILE_CAPACITY", "50"))
+)
+coalescer = SingleFlight() if os.getenv("ASAAP_COALESCE", "1") == "1" else None
+# Default per-request latency budget; X-Latency-Budget-Ms overrides it, 0 disables it
+LATENCY_BUDGET_MS = float(os.getenv("ASAAP_LATENCY_BUDGET_MS", "1000"))
+POLICY_CACHE_CONTROL = f"public, max-age={int(os.getenv('ASAAP_POLICY_MAX_AGE', '3600'))}"
+
+def require_admin(token):
+    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+async def resolve_bot(tenant):
+    """Chatbot for the requested tenant; no tenant means the default datasets"""
+    if not tenant:
+        return bot
+    if tenants is None or tenant not in tenants:
+        raise HTTPException(status_code=404, detail=f"Unknown tenant: {tenant}")
+    # A tenant's first request builds its tables and Chroma collection; keep that off the event loop
+    return await run_in_threadpool(tenants.get, tenant)
+
+warmup_report = None
+
+@app.on_event("startup")
+def warm_caches():
+    # Runs before the server accepts traffic, bounded by the time budget
+    global warmup_report
+    if not LITE and os.getenv("ASAAP_WARMUP", "1") == "1":
+        warmer = CacheWarmer(
+            bot,
+            top_n=int(os.getenv("ASAAP_WARMUP_TOP_N", "500")),
+            time_budget=float(os.getenv("ASAAP_WARMUP_BUDGET", "20"))
+        )
+        warmup_report = warmer.run()
+        print(f"✅ Cache warm-up: {warmup_report}")
+
+@app.on_event("startup")
+def start_reloader():
+    if os.getenv("ASAAP_WATCH_DATASETS", "0") == "1":
+        reloader.start()
+
+@app.on_event("startup")
+async def start_rpc_server():
+    if rpc_server is not None:
+        await rpc_server.start(os.getenv("ASAAP_RPC_HOST", "127.0.0.1"), int(os.getenv("ASAAP_RPC_PORT")))
+        print(f"✅ RPC interface listening on port {os.getenv('ASAAP_RPC_PORT')}")
+
+@app.on_event("shutdown")
+async def stop_rpc_server():
+    if rpc_server is not None:
+        await rpc_server.close()
+
+@app.on_event("shutdown")
+def stop_reloader():
+    reloader.stop()
+
+@app.on_event("shutdown")
+def flush_transcripts():
+    if transcripts is not None:
+        transcripts.close()
+
+@app.on_event("shutdown")
+def close_flight_data():
+    if flight_data is not None:
+        flight_data.close()
+
+@app.on_event("shutdown")
+def close_shared_cache():
+    if shared_cache is not None:
+        shared_cache.close()
+
+@app.get("/ready")
+async def ready():
+    return {"ready": True, "warmup": warmup_report}
+
+async def answer(message, tenant=None, profile_mode=None, budget_ms=None):
+    """The pipeline behind /chat and the RPC interface: routing, profiling, coalescing, transcripts"""
+    chatbot = await resolve_bot(tenant)
+    # Started after tenant loading, which the budget can't degrade; it does include threadpool waits
+    deadline = Deadline.from_budget(budget_ms, LATENCY_BUDGET_MS)
+    if profile_mode is not None:
+        reply = await run_in_threadpool(profiler.run, profile_mode, message[:80], chatbot.get_reply, message, deadline)
+    elif coalescer is not None:
+        # Identical concurrent messages (e.g. during a mass delay) share one pipeline run; the budget
+        # is part of the key so a tight-budget degraded reply is never handed to a relaxed caller
+        budget = deadline.budget_ms if deadline is not None else None
+        reply = await coalescer.run(coalesce_key(message, tenant, budget), chatbot.get_reply, message, deadline)
+    else:
+        reply = await run_in_threadpool(chatbot.get_reply, message, deadline)
+    if transcripts is not None:
+        if transcripts.policy == "block":
+            # The backpressure wait must not stall every other request on the event loop
+            await run_in_threadpool(transcripts.log_turn, message, reply, tenant=tenant)
+        else:
+            transcripts.log_turn(message, reply, tenant=tenant)
+    return reply
+
+# Binary RPC for internal services, served from this process so it shares the pipeline above
+rpc_server = RPCServer(answer) if os.getenv("ASAAP_RPC_PORT") else None
 
 @app.post("/chat")
-async def chat(message: str = Form(...)):
-    response = bot.get_response(message)
-    return {"response": response}
+async def chat(response: Response, message: str = Form(...), tenant: str = Form(None),
+               x_tenant: str = Header(None), x_profile: str = Header(None), x_admin_token: str = Header(None),
+               x_latency_budget_ms: str = Header(None)):
+    mode = profiler.select(x_profile, x_admin_token) if profiler.enabled else None
+    tenant = tenant or x_tenant
+    reply = await answer(message, tenant, mode, x_latency_budget_ms)
+    entry = reply["policy"]
+    if entry is not None:
+        # Precomputed body. The reply depends on the posted message, so it is never cached here;
+        # Content-Location points at the cacheable GET representation of the same policy
+        location = f"/policy/{entry.intent}" + (f"?tenant={quote(tenant)}" if tenant else "")
+        return Response(
+            content=entry.chat_body,
+            media_type="application/json",
+            headers={"Cache-Control": "private, no-store", "Content-Location": location,
+                     "X-Degradation": reply["degradation"]}
+        )
+    response.headers["X-Degradation"] = reply["degradation"]
+    return {"response": reply["response"]}
+
+@app.get("/policy/{intent}")
+async def policy(intent: str, tenant: str = None, x_tenant: str = Header(None), if_none_match: str = Header(None)):
+    entry = (await resolve_bot(tenant or x_tenant)).policy_table.get(intent)
+    if entry is None:
+        raise HTTPException(status_code=404, detail=f"Unknown policy intent: {intent}")
+    # The body depends on X-Tenant, so shared caches must key on it too
+    headers = {"ETag": entry.etag, "Cache-Control": POLICY_CACHE_CONTROL, "Vary": "X-Tenant"}
+    if etag_matches(if_none_match, entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry.body, media_type="application/json", headers=headers)
+
+@app.post("/admin/reload")
+async def admin_reload(x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    reloader.trigger()
+    return {"status": "scheduled", **reloader.status()}
+
+@app.get("/admin/reload")
+async def admin_reload_status(x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    return reloader.status()
+
+@app.get("/admin/profiles")
+async def admin_profiles(x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    return profiler.list()
+
+@app.get("/admin/profiles/collapsed", response_class=PlainTextResponse)
+async def admin_profiles_collapsed(x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    return profiler.collapsed()
+
+@app.get("/admin/profiles/{profile_id}/collapsed", response_class=PlainTextResponse)
+async def admin_profile_collapsed(profile_id: int, x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    profile = profiler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Unknown profile: {profile_id}")
+    return profiler.collapsed([profile])
+
+@app.get("/admin/semantic-cache")
+async def admin_semantic_cache(x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    if semantic_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **semantic_cache.stats()}
+
+@app.get("/admin/transcripts")
+async def admin_transcripts(x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    if transcripts is None:
+        return {"enabled": False}
+    return {"enabled": True, **transcripts.stats()}
+
+@app.get("/admin/tenants")
+async def admin_tenants(x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    if tenants is None:
+        return {"enabled": False}
+    return {"enabled": True, **tenants.stats()}
+
+@app.get("/admin/flight-data")
+async def admin_flight_data(x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    if flight_data is None:
+        return {"enabled": False}
+    return {"enabled": True, **flight_data.stats()}
+
+@app.get("/admin/latency-budget")
+async def admin_latency_budget(tenant: str = None, x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    return {"default_budget_ms": LATENCY_BUDGET_MS, **(await resolve_bot(tenant)).stage_costs.stats()}
+
+@app.get("/admin/cache-tiers")
+async def admin_cache_tiers(tenant: str = None, x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    tiers = (await resolve_bot(tenant)).cache_tiers()
+    if shared_cache is not None:
+        tiers["shared"] = {k: v for k, v in shared_cache.stats().items() if k not in ("embedding", "response")}
+    return tiers
+
+@app.get("/admin/generation")
+async def admin_generation(x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    scheduler = bot.model.scheduler if bot.model is not None else None
+    if scheduler is None:
+        return {"enabled": False}
+    return {"enabled": True, **scheduler.stats()}
+
+@app.get("/admin/rpc")
+async def admin_rpc(x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    if rpc_server is None:
+        return {"enabled": False}
+    return {"enabled": True, **rpc_server.stats()}
+
+@app.get("/admin/coalescing")
+async def admin_coalescing(x_admin_token: str = Header(None)):
+    require_admin(x_admin_token)
+    if coalescer is None:
+        return {"enabled": False}
+    return {"enabled": True, **coalescer.stats()}
@@ -1,23 +1,118 @@
+import os
+import threading
+import time
+from collections import OrderedDict
 from sentence_transformers import SentenceTransformer
 from transformers import pipeline
+from app.shared_cache import TierStats
+
+EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
 
 class AirlineModel:
-    def __init__(self):
-        self.embedder = SentenceTransformer('all-MiniLM-L6-v2')
-        self.generator = pipeline("text-generation", model="gpt2")
+    def __init__(self, batched_generation=None, embedding_cache_size=None, shared_cache=None,
+                 embedder=None, with_generator=True):
+        """embedder replaces the MiniLM SentenceTransformer (anything with encode(texts, batch_size));
+        with_generator=False skips loading GPT-2 for embedding-only use such as the benchmarks"""
+        # Host-tuned settings (see autotune.py)
+        if os.getenv("ASAAP_TORCH_THREADS"):
+            import torch
+            torch.set_num_threads(int(os.getenv("ASAAP_TORCH_THREADS")))
+        self.encode_batch_size = int(os.getenv("ASAAP_ENCODE_BATCH_SIZE", "32"))
+
+        self.embedder = embedder if embedder is not None else SentenceTransformer(EMBEDDING_MODEL)
+        # Part of the shared cache keys: vectors from different models must never mix
+        self.embedding_model = EMBEDDING_MODEL if embedder is None else type(embedder).__name__
+        self.generator = pipeline("text-generation", model="gpt2") if with_generator else None
+
+        # Exact-text LRU of embeddings; repeated messages skip the encoder
+        if embedding_cache_size is None:
+            embedding_cache_size = int(os.getenv("ASAAP_EMBEDDING_CACHE_SIZE", "4096"))
+        self.embedding_cache_size = embedding_cache_size
+        self._embedding_cache = OrderedDict()
+        self._embedding_lock = threading.Lock()
+        self.embedding_tier = TierStats()
+        # Optional second level shared with the other nodes (see app/shared_cache.py)
+        self.shared_cache = shared_cache
+
+        # Optional continuous-batching scheduler for concurrent generate_response callers
+        if batched_generation is None:
+            batched_generation = os.getenv("ASAAP_BATCHED_GENERATION", "0") == "1"
+        self.scheduler = None
+        if batched_generation and self.generator is not None:
+            from app.generation_scheduler import GenerationScheduler
+            self.scheduler = GenerationScheduler(
+                self.generator.model,
+                self.generator.tokenizer,
+                max_batch_size=int(os.getenv("ASAAP_GEN_BATCH_SIZE", "8")),
+                max_queue_wait_ms=float(os.getenv("ASAAP_GEN_MAX_WAIT_MS", "10")),
+                max_new_tokens=30,
+                temperature=0.3
+            )
 
     def get_embedding(self, text):
-        return self.embedder.encode([text])[0]
+        return self.get_embeddings([text])[0]
+
+    def get_embeddings(self, texts, batch_size=None):
+        """Embeddings for several texts: local LRU, then the shared cache, then one encode call"""
+        texts = list(texts)
+        batch_size = batch_size or self.encode_batch_size
+        embeddings = [self._cached_embedding(text) for text in texts]
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+
+        shared = self.shared_cache
+        if shared is not None and missing:
+            found = shared.get_embeddings(self.embedding_model, [texts[i] for i in missing])
+            for i, embedding in zip(missing, found):
+                if embedding is not None:
+                    embeddings[i] = embedding
+                    self._cache_embedding(texts[i], embedding)
+            missing = [i for i in missing if embeddings[i] is None]
+
+        if missing:
+            encoded = self.embedder.encode([texts[i] for i in missing], batch_size=batch_size)
+            for i, embedding in zip(missing, encoded):
+                embeddings[i] = embedding
+                self._cache_embedding(texts[i], embedding)
+            if shared is not None:
+                shared.set_embeddings(self.embedding_model, [(texts[i], embeddings[i]) for i in missing])
+        return embeddings
+
+    def _cached_embedding(self, text):
+        if not self.embedding_cache_size:
+            return None
+        started = time.perf_counter()
+        with self._embedding_lock:
+            embedding = self._embedding_cache.get(text)
+            if embedding is not None:
+                self._embedding_cache.move_to_end(text)
+        self.embedding_tier.record(embedding is not None, 1, (time.perf_counter() - started) * 1000)
+        return embedding
+
+    def _cache_embedding(self, text, embedding):
+        if not self.embedding_cache_size:
+            return
+        with self._embedding_lock:
+            self._embedding_cache[text] = embedding
+            self._embedding_cache.move_to_end(text)
+            while len(self._embedding_cache) > self.embedding_cache_size:
+                self._embedding_cache.popitem(last=False)
 
     def generate_response(self, prompt):
-        response = self.generator(
-            prompt, 
-            max_new_tokens=30, 
-            temperature=0.3,
-            do_sample=True,
-            pad_token_id=self.generator.tokenizer.eos_token_id
-        )[0]['generated_text']
-        
+        if self.scheduler is not None:
+            response = self.scheduler.generate(prompt)
+        else:
+            response = self.generator(
+                prompt, 
+                max_new_tokens=30, 
+                temperature=0.3,
+                do_sample=True,
+                pad_token_id=self.generator.tokenizer.eos_token_id
+            )[0]['generated_text']
+        return self._extract_reply(response)
+
+    @staticmethod
+    def _extract_reply(response):
+        """Trim generated text down to the bot's reply"""
         # Extract only the bot's response, not the full prompt
         if "Bot:" in response:
             bot_response = response.split("Bot:")[-1].strip()
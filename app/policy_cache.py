@@ -0,0 +1,56 @@
+import hashlib
+import json
+
+# Intents whose answer is the same canonical policy text for every customer
+FAST_PATH_INTENTS = ("pet_policy", "wifi", "meals", "check_in", "lounge_access")
+
+class PolicyEntry:
+    """Precomputed policy answer with ready-to-send bodies and strong ETags"""
+
+    def __init__(self, intent, text):
+        self.intent = intent
+        self.text = text
+
+        # /policy/{intent} representation
+        self.body = json.dumps({"intent": intent, "policy": text}).encode("utf-8")
+        self.etag = self._etag(self.body)
+
+        # /chat representation, so the fast path never re-serializes
+        self.chat_body = json.dumps({"response": text}).encode("utf-8")
+
+    @staticmethod
+    def _etag(body):
+        return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+class PolicyTable:
+    """Immutable in-memory table of canonical policy answers"""
+
+    def __init__(self, policies, intents=FAST_PATH_INTENTS):
+        self.entries = {
+            intent: PolicyEntry(intent, text)
+            for intent, text in policies.items()
+        }
+        self.fast_path_intents = frozenset(i for i in intents if i in self.entries)
+
+    def get(self, intent):
+        return self.entries.get(intent)
+
+    def fast_path(self, intent):
+        """Return the entry for a deterministic intent, or None"""
+        if intent in self.fast_path_intents:
+            return self.entries[intent]
+        return None
+
+def etag_matches(if_none_match, etag):
+    """Evaluate an If-None-Match header against an ETag (weak comparison, RFC 9110)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
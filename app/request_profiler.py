@@ -0,0 +1,138 @@
+import itertools
+import random
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+class _StackTracer:
+    """Deterministic profiler: exact self-time per call stack via sys.setprofile"""
+
+    def __init__(self):
+        self.stacks = Counter()
+        self._stack = []
+        self._last = None
+
+    def _frame_name(self, frame, arg, event):
+        if event.startswith("c_"):
+            return f"{getattr(arg, '__module__', None) or 'builtins'}.{getattr(arg, '__qualname__', arg)}"
+        code = frame.f_code
+        return f"{frame.f_globals.get('__name__', '?')}.{code.co_name}:{code.co_firstlineno}"
+
+    def _callback(self, frame, event, arg):
+        now = time.perf_counter_ns()
+        if self._stack:
+            self.stacks[";".join(self._stack)] += now - self._last
+        if event in ("call", "c_call"):
+            self._stack.append(self._frame_name(frame, arg, event))
+        elif self._stack:
+            self._stack.pop()
+        self._last = time.perf_counter_ns()
+
+    def run(self, func, *args):
+        self._last = time.perf_counter_ns()
+        sys.setprofile(self._callback)
+        try:
+            return func(*args)
+        finally:
+            sys.setprofile(None)
+
+class _StackSampler:
+    """Statistical profiler: samples the calling thread's stack from a helper thread"""
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.stacks = Counter()
+        self._done = threading.Event()
+
+    def _sample(self, thread_id, root):
+        while not self._done.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            names = []
+            while frame is not None and frame is not root:
+                code = frame.f_code
+                names.append(f"{frame.f_globals.get('__name__', '?')}.{code.co_name}:{code.co_firstlineno}")
+                frame = frame.f_back
+            if names:
+                # Weight each sample by the interval so both modes report nanoseconds
+                self.stacks[";".join(reversed(names))] += int(self.interval * 1e9)
+
+    def run(self, func, *args):
+        root = sys._getframe()
+        sampler = threading.Thread(target=self._sample, args=(threading.get_ident(), root), daemon=True)
+        sampler.start()
+        try:
+            return func(*args)
+        finally:
+            self._done.set()
+            sampler.join()
+
+class RequestProfiler:
+    """Opt-in per-request profiling with a bounded ring buffer of recent profiles"""
+
+    MODES = ("sample", "trace")
+
+    def __init__(self, admin_token=None, sample_rate=0.0, capacity=50, interval=0.001):
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.interval = interval
+        # Appended to from threadpool threads; read only through snapshot()
+        self._profiles = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        # Checked first on every request; False means the profiler costs nothing
+        self.enabled = bool(admin_token) or sample_rate > 0
+
+    def select(self, header_mode, token):
+        """Return the profiling mode for this request, or None"""
+        if header_mode and self.admin_token and token == self.admin_token:
+            return header_mode if header_mode in self.MODES else "sample"
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return "sample"
+        return None
+
+    def run(self, mode, label, func, *args):
+        """Call func(*args) under the given profiler and store the result"""
+        profiler = _StackTracer() if mode == "trace" else _StackSampler(self.interval)
+        started = time.time()
+        t0 = time.perf_counter()
+        try:
+            return profiler.run(func, *args)
+        finally:
+            profile = {
+                "id": next(self._ids),
+                "mode": mode,
+                "label": label,
+                "started_at": started,
+                "duration_ms": round((time.perf_counter() - t0) * 1000, 3),
+                "stacks": profiler.stacks,
+            }
+            with self._lock:
+                self._profiles.append(profile)
+
+    def snapshot(self):
+        """Stored profiles, oldest first, copied so callers can iterate while requests keep adding"""
+        with self._lock:
+            return list(self._profiles)
+
+    def list(self):
+        return [
+            {k: v for k, v in profile.items() if k != "stacks"} | {"stack_count": len(profile["stacks"])}
+            for profile in reversed(self.snapshot())
+        ]
+
+    def get(self, profile_id):
+        for profile in self.snapshot():
+            if profile["id"] == profile_id:
+                return profile
+        return None
+
+    def collapsed(self, profiles=None):
+        """Render profiles (default: all stored) in flamegraph.pl / speedscope collapsed-stack format,
+        values in microseconds"""
+        if profiles is None:
+            profiles = self.snapshot()
+        merged = Counter()
+        for profile in profiles:
+            merged.update(profile["stacks"])
+        return "".join(f"{stack} {max(1, ns // 1000)}\n" for stack, ns in merged.most_common())
@@ -0,0 +1,71 @@
+"""
+Response dataset readers
+JSON arrays are parsed whole; JSONL (optionally gzipped) is streamed in chunks so
+large corpora never sit in memory as raw records
+
+    python -m app.response_dataset convert app/responses.json data/responses.jsonl.gz
+"""
+
+import argparse
+import gzip
+import json
+from itertools import islice
+
+def is_streaming(path):
+    return path.endswith((".jsonl", ".jsonl.gz", ".ndjson"))
+
+def _open(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8")
+    return open(path, "r", encoding="utf-8")
+
+def iter_records(path, chunk_size=10000):
+    """Yield dataset records one at a time"""
+    if not is_streaming(path):
+        with open(path, "r") as f:
+            yield from json.load(f)
+        return
+    with _open(path) as f:
+        line_no = 0
+        while True:
+            lines = list(islice(f, chunk_size))
+            if not lines:
+                break
+            rows = [line for line in lines if line.strip()]
+            try:
+                # One parser call per chunk instead of one per line
+                records = json.loads("[" + ",".join(rows) + "]")
+            except ValueError:
+                records = []
+                for offset, line in enumerate(lines, line_no + 1):
+                    if line.strip():
+                        try:
+                            records.append(json.loads(line))
+                        except ValueError as e:
+                            raise ValueError(f"{path}:{offset}: {e}") from None
+            line_no += len(lines)
+            yield from records
+
+def convert(source, target):
+    """Write any readable dataset as JSONL (gzipped if the target ends in .gz)"""
+    opener = gzip.open if target.endswith(".gz") else open
+    count = 0
+    with opener(target, "wt", encoding="utf-8") as out:
+        for record in iter_records(source):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+def main():
+    parser = argparse.ArgumentParser(description="Response dataset tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    conv = sub.add_parser("convert", help="Convert a dataset to JSONL")
+    conv.add_argument("source")
+    conv.add_argument("target")
+    args = parser.parse_args()
+
+    count = convert(args.source, args.target)
+    print(f"✅ Wrote {count} records to {args.target}")
+
+if __name__ == "__main__":
+    main()
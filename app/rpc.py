@@ -0,0 +1,235 @@
+"""
+Binary RPC interface for internal services
+Length-prefixed frames over persistent TCP connections, msgpack-encoded when available (JSON otherwise)
+
+Frame: 4-byte big-endian payload length, 1-byte codec (0 = JSON, 1 = msgpack), payload.
+Replies use the codec of the request they answer.
+
+Requests (one connection can carry many in flight; replies are matched by id):
+    {"id": 1, "method": "chat", "message": "...", "tenant": None, "budget_ms": 200}
+    {"id": 2, "method": "batch", "messages": ["...", "..."]}
+    {"id": 3, "method": "stream", "seq": 0, "message": "..."}    # repeated per message
+    {"id": 3, "method": "stream", "end": True}                   # half-close the stream
+Replies:
+    {"id": 1, "result": {...}}  /  {"id": 2, "results": [...]}
+    {"id": 3, "seq": 0, "result": {...}} as each message completes, then {"id": 3, "end": True}
+    {"id": ..., "error": "..."} on failure
+"""
+
+import asyncio
+import itertools
+import json
+import socket
+import struct
+import threading
+
+try:
+    import msgpack
+except ImportError:  # JSON keeps the protocol usable without the optional dependency
+    msgpack = None
+
+from app.utterance import Utterance
+
+HEADER = struct.Struct(">IB")
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+MAX_FRAME_BYTES = 16 * 1024 * 1024
+
+class RPCError(Exception):
+    """The server answered a call with an error"""
+
+def encode(payload, codec):
+    if codec == CODEC_MSGPACK:
+        body = msgpack.packb(payload, use_bin_type=True)
+    else:
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return HEADER.pack(len(body), codec) + body
+
+def decode(body, codec):
+    if codec == CODEC_MSGPACK:
+        if msgpack is None:
+            raise ValueError("msgpack frame received but msgpack is not installed")
+        return msgpack.unpackb(body, raw=False)
+    return json.loads(body)
+
+def structured(message, reply):
+    """Pipeline reply as an RPC result: intent, confidence, entities and response"""
+    utterance = Utterance.of(message)
+    return {
+        "intent": reply["intent"],
+        "confidence": reply.get("confidence"),
+        "entities": {
+            "booking_reference": utterance.booking_info,
+            "flight_number": utterance.flight_number,
+            "destination": utterance.destination,
+        },
+        "response": reply["response"],
+        "tone": reply.get("tone"),
+        "degradation": reply.get("degradation"),
+    }
+
+class RPCServer:
+    """asyncio TCP server; answer(message, tenant) is the same coroutine /chat uses"""
+
+    def __init__(self, answer, max_inflight=64, max_batch=256):
+        self.answer = answer
+        self.max_inflight = max_inflight
+        self.max_batch = max_batch
+        self.server = None
+        self._stats = {"connections": 0, "calls": 0, "messages": 0, "errors": 0}
+
+    async def start(self, host="127.0.0.1", port=9000):
+        # reuse_port lets every uvicorn worker listen on the same port (Linux/BSD)
+        reuse_port = hasattr(socket, "SO_REUSEPORT") or None
+        self.server = await asyncio.start_server(self._serve, host, port, reuse_port=reuse_port)
+        return self.server
+
+    async def close(self):
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+
+    def stats(self):
+        return dict(self._stats, codec="msgpack" if msgpack is not None else "json")
+
+    async def _call(self, message, tenant, budget_ms=None):
+        reply = await self.answer(message, tenant, budget_ms=budget_ms)
+        self._stats["messages"] += 1
+        return structured(message, reply)
+
+    async def _serve(self, reader, writer):
+        self._stats["connections"] += 1
+        sock = writer.get_extra_info("socket")
+        if sock is not None:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        slots = asyncio.Semaphore(self.max_inflight)  # backpressure: stop reading when saturated
+        streams = {}  # stream id -> tasks still running
+        tasks = set()
+
+        async def send(payload, codec):
+            writer.write(encode(payload, codec))
+            await writer.drain()
+
+        async def run(request, codec):
+            call_id = request.get("id")
+            try:
+                method = request.get("method")
+                tenant = request.get("tenant")
+                budget_ms = request.get("budget_ms")
+                if method == "chat":
+                    reply = {"id": call_id, "result": await self._call(request["message"], tenant, budget_ms)}
+                elif method == "batch":
+                    messages = request["messages"]
+                    if len(messages) > self.max_batch:
+                        raise ValueError(f"batch larger than {self.max_batch} messages")
+                    results = await asyncio.gather(*(self._call(m, tenant, budget_ms) for m in messages))
+                    reply = {"id": call_id, "results": results}
+                elif method == "stream":
+                    reply = {"id": call_id, "seq": request.get("seq"),
+                             "result": await self._call(request["message"], tenant, budget_ms)}
+                else:
+                    raise ValueError(f"unknown method: {method}")
+            except Exception as e:
+                self._stats["errors"] += 1
+                reply = {"id": call_id, "error": getattr(e, "detail", None) or str(e) or e.__class__.__name__}
+                if request.get("method") == "stream":
+                    reply["seq"] = request.get("seq")
+            finally:
+                slots.release()
+            await send(reply, codec)
+
+        async def end_stream(call_id, pending, codec):
+            await asyncio.gather(*pending, return_exceptions=True)
+            await send({"id": call_id, "end": True}, codec)
+
+        try:
+            while True:
+                header = await reader.readexactly(HEADER.size)
+                length, codec = HEADER.unpack(header)
+                if length > MAX_FRAME_BYTES:
+                    break
+                request = decode(await reader.readexactly(length), codec)
+                self._stats["calls"] += 1
+
+                if request.get("method") == "stream" and request.get("end"):
+                    pending = streams.pop(request.get("id"), set())
+                    task = asyncio.ensure_future(end_stream(request.get("id"), pending, codec))
+                else:
+                    await slots.acquire()
+                    task = asyncio.ensure_future(run(request, codec))
+                    if request.get("method") == "stream":
+                        streams.setdefault(request.get("id"), set()).add(task)
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            writer.close()
+
+class RPCClient:
+    """Blocking client over one persistent connection (not thread-safe; use one per thread)"""
+
+    def __init__(self, host="127.0.0.1", port=9000, codec=None, timeout=30.0):
+        self.codec = codec if codec is not None else (CODEC_MSGPACK if msgpack is not None else CODEC_JSON)
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.file = self.sock.makefile("rb")
+        self._ids = itertools.count(1)
+
+    def _send(self, payload):
+        self.sock.sendall(encode(payload, self.codec))
+
+    def _recv(self):
+        header = self.file.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise ConnectionError("connection closed by server")
+        length, codec = HEADER.unpack(header)
+        return decode(self.file.read(length), codec)
+
+    def _unary(self, payload):
+        self._send(payload)
+        reply = self._recv()
+        if "error" in reply:
+            raise RPCError(reply["error"])
+        return reply
+
+    def chat(self, message, tenant=None, budget_ms=None):
+        return self._unary({"id": next(self._ids), "method": "chat", "message": message, "tenant": tenant,
+                            "budget_ms": budget_ms})["result"]
+
+    def batch(self, messages, tenant=None, budget_ms=None):
+        return self._unary({"id": next(self._ids), "method": "batch", "messages": list(messages),
+                            "tenant": tenant, "budget_ms": budget_ms})["results"]
+
+    def stream(self, messages, tenant=None, budget_ms=None):
+        """Send messages while results come back; yields (seq, result) in completion order"""
+        call_id = next(self._ids)
+
+        def produce():
+            for seq, message in enumerate(messages):
+                self._send({"id": call_id, "method": "stream", "seq": seq, "message": message, "tenant": tenant,
+                            "budget_ms": budget_ms})
+            self._send({"id": call_id, "method": "stream", "end": True})
+
+        sender = threading.Thread(target=produce, daemon=True)
+        sender.start()
+        while True:
+            reply = self._recv()
+            if reply.get("end"):
+                break
+            if "error" in reply:
+                raise RPCError(reply["error"])
+            yield reply["seq"], reply["result"]
+        sender.join()
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,122 @@
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Intents whose replies depend on neither entities nor wording. change_flight and general are out:
+# negations ("no longer need") and greeting/thanks keywords pick different replies for near-paraphrases
+DEFAULT_CACHEABLE_INTENTS = (
+    "pet_policy", "wifi", "meals", "check_in", "lounge_access",
+    "seat_selection", "baggage_policy", "fare_inquiry",
+)
+
+class SemanticCache:
+    """Small in-memory vector index of (embedding, intent, response) with LRU/TTL eviction"""
+
+    def __init__(self, capacity=1024, ttl=600, default_threshold=0.9, thresholds=None,
+                 cacheable_intents=DEFAULT_CACHEABLE_INTENTS, sweep_interval=None):
+        self.capacity = capacity
+        self.ttl = ttl
+        # Lookups already skip expired rows; freeing their slots can wait for a periodic sweep
+        self.sweep_interval = sweep_interval if sweep_interval is not None else min(ttl, 60)
+        self._next_sweep = 0.0
+        self.default_threshold = default_threshold
+        self.thresholds = dict(thresholds or {})
+        self.cacheable_intents = frozenset(cacheable_intents)
+        self._lock = threading.Lock()
+
+        # Unit vectors live in one preallocated matrix; slot metadata alongside
+        self._vectors = None
+        self._intents = np.empty(capacity, dtype=object)
+        self._expires = np.zeros(capacity)
+        self._entries = OrderedDict()  # slot -> {"response", "cost_ms"}, oldest first
+        self._free = list(range(capacity - 1, -1, -1))
+
+        self.lookups = 0
+        self.hits = 0
+        self.saved_ms = 0.0
+
+    def cacheable(self, intent, utterance):
+        """Only allow-listed intents, and never when the message carries entities"""
+        return (intent in self.cacheable_intents and utterance.booking_info is None
+                and utterance.destination is None and utterance.flight_number is None)
+
+    @staticmethod
+    def _normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, intent, embedding):
+        """Return a cached response for a similar message with the same intent, or None"""
+        started = time.perf_counter()
+        with self._lock:
+            self.lookups += 1
+            if not self._entries:
+                return None
+            now = time.time()
+            if now >= self._next_sweep:
+                self._evict_expired(now)
+            mask = (self._intents == intent) & (self._expires > now)
+            if not mask.any():
+                return None
+            slots = np.flatnonzero(mask)
+            scores = self._vectors[slots] @ self._normalize(embedding)
+            best = int(np.argmax(scores))
+            if scores[best] < self.thresholds.get(intent, self.default_threshold):
+                return None
+            slot = int(slots[best])
+            entry = self._entries[slot]
+            self._entries.move_to_end(slot)
+            self.hits += 1
+            self.saved_ms += max(0.0, entry["cost_ms"] - (time.perf_counter() - started) * 1000)
+            return entry["response"]
+
+    def insert(self, intent, embedding, response, cost_ms=0.0):
+        """Store a response; cost_ms is what generating it took, for the saved-latency metric"""
+        vector = self._normalize(embedding)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.capacity, vector.shape[0]), dtype=np.float32)
+            if not self._free:
+                self._evict_expired(time.time())
+            if not self._free:
+                oldest, _ = self._entries.popitem(last=False)
+                self._release(oldest)
+            slot = self._free.pop()
+            self._vectors[slot] = vector
+            self._intents[slot] = intent
+            self._expires[slot] = time.time() + self.ttl
+            self._entries[slot] = {"response": response, "cost_ms": cost_ms}
+
+    def _release(self, slot):
+        self._intents[slot] = None
+        self._expires[slot] = 0.0
+        self._free.append(slot)
+
+    def _evict_expired(self, now):
+        # Free slots have expires == 0, so one masked comparison finds every expired entry
+        expired = np.flatnonzero((self._expires > 0) & (self._expires <= now))
+        for slot in expired.tolist():
+            del self._entries[slot]
+        self._intents[expired] = None
+        self._expires[expired] = 0.0
+        self._free.extend(expired.tolist())
+        self._next_sweep = now + self.sweep_interval
+
+    def clear(self):
+        with self._lock:
+            for slot in list(self._entries):
+                self._release(slot)
+            self._entries.clear()
+
+    def stats(self):
+        return {
+            "entries": len(self._entries),
+            "capacity": self.capacity,
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "saved_ms": round(self.saved_ms, 2),
+        }
@@ -0,0 +1,368 @@
+"""
+Second-level cache shared by every backend node
+Speaks RESP (the Redis protocol), so any Redis-compatible server works in production;
+LocalKVServer is an in-process stand-in for tests and single-host setups
+
+    python -m app.shared_cache serve --port 6380
+"""
+
+import argparse
+import asyncio
+import hashlib
+import queue
+import socket
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+
+import numpy as np
+
+from app.flight_data import CircuitBreaker
+
+class TierStats:
+    """Hit rate and lookup latency for one cache tier"""
+
+    def __init__(self, window=1024):
+        self.lookups = 0
+        self.hits = 0
+        self.errors = 0
+        self._latencies = deque(maxlen=window)  # recent lookups only, for percentiles
+        self._lock = threading.Lock()
+
+    def record(self, hits, lookups, ms):
+        with self._lock:
+            self.lookups += lookups
+            self.hits += hits
+            self._latencies.append(ms)
+
+    def record_error(self, lookups=1):
+        with self._lock:
+            self.lookups += lookups
+            self.errors += 1
+
+    def stats(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            lookups, hits, errors = self.lookups, self.hits, self.errors
+
+        def pct(q):
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))], 3) if latencies else None
+
+        return {
+            "lookups": lookups,
+            "hits": hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "errors": errors,
+            "latency_ms": {"p50": pct(0.5), "p95": pct(0.95)},
+        }
+
+def _command(*args):
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if not isinstance(arg, bytes):
+            arg = str(arg).encode("utf-8")
+        out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(out)
+
+def _read_reply(stream):
+    line = stream.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest
+    if kind == b"-":
+        raise ConnectionError(rest.decode("utf-8", "replace"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = stream.read(length + 2)
+        if len(data) != length + 2:
+            raise ConnectionError("connection closed mid-reply")
+        return data[:-2]
+    if kind == b"*":
+        return [_read_reply(stream) for _ in range(int(rest))]
+    raise ConnectionError(f"unexpected reply: {line!r}")
+
+class _Connection:
+    def __init__(self, host, port, timeout):
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.stream = self.sock.makefile("rb")
+
+    def pipeline(self, commands):
+        """Send all commands in one write, then read their replies in order"""
+        self.sock.sendall(b"".join(commands))
+        return [_read_reply(self.stream) for _ in commands]
+
+    def close(self):
+        self.stream.close()
+        self.sock.close()
+
+class SharedCache:
+    """Embeddings (raw float32) and cacheable responses in a shared key-value server
+
+    Every call is bounded by a short timeout; on a timeout, error or exhausted pool the
+    caller gets a miss and computes locally. Repeated failures open a circuit breaker so
+    an unreachable server costs nothing until it is retried.
+    """
+
+    def __init__(self, host="127.0.0.1", port=6379, namespace="asaap", timeout=0.02, pool_size=8,
+                 embedding_ttl=86400, response_ttl=300, failure_threshold=3, reset_timeout=5.0):
+        self.host = host
+        self.port = port
+        self.namespace = namespace
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.embedding_ttl = embedding_ttl
+        self.response_ttl = response_ttl
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.tiers = {"embedding": TierStats(), "response": TierStats()}
+
+        self._pool = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_url(cls, url, **kwargs):
+        """redis://host:port"""
+        parsed = urlparse(url)
+        return cls(parsed.hostname or "127.0.0.1", parsed.port or 6379, **kwargs)
+
+    def _acquire(self):
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened >= self.pool_size:
+                return None  # every connection busy: don't queue behind them, compute locally
+            self._opened += 1
+        try:
+            return _Connection(self.host, self.port, self.timeout)
+        except OSError:
+            with self._lock:
+                self._opened -= 1
+            raise
+
+    def _discard(self, conn):
+        # A timed-out connection may still receive the late reply, so it can't be reused
+        conn.close()
+        with self._lock:
+            self._opened -= 1
+
+    def _execute(self, commands):
+        """Run a pipeline; returns replies, or None when the cache can't answer in time"""
+        with self._lock:
+            if not self.breaker.allow():
+                return None
+        conn = None
+        try:
+            conn = self._acquire()
+            if conn is None:
+                with self._lock:
+                    self.breaker.trial_in_flight = False
+                return None
+            replies = conn.pipeline(commands)
+        except (OSError, ConnectionError, ValueError):
+            if conn is not None:
+                self._discard(conn)
+            with self._lock:
+                self.breaker.record_failure()
+            return None
+        self._pool.put(conn)
+        with self._lock:
+            self.breaker.record_success()
+        return replies
+
+    def _key(self, kind, text):
+        return f"{self.namespace}:{kind}:{hashlib.sha1(text.encode('utf-8')).hexdigest()}"
+
+    def get_embeddings(self, model, texts):
+        """One MGET for the whole batch; None for each miss. Keys include the embedding model name"""
+        if not texts:
+            return []
+        started = time.perf_counter()
+        replies = self._execute([_command("MGET", *(self._key(f"emb:{model}", t) for t in texts))])
+        tier = self.tiers["embedding"]
+        if replies is None:
+            tier.record_error(len(texts))
+            return [None] * len(texts)
+        values = [np.frombuffer(v, dtype="<f4") if v else None for v in replies[0]]
+        tier.record(sum(v is not None for v in values), len(texts), (time.perf_counter() - started) * 1000)
+        return values
+
+    def set_embeddings(self, model, items):
+        """Pipelined SETs of (text, vector) pairs"""
+        commands = [
+            _command("SET", self._key(f"emb:{model}", text), np.asarray(vector, dtype="<f4").tobytes(),
+                     "EX", self.embedding_ttl)
+            for text, vector in items
+        ]
+        if commands:
+            self._execute(commands)
+
+    def get_response(self, scope, version, intent, text):
+        """Cached reply; version identifies the datasets it was built from, so reloads never see stale ones"""
+        started = time.perf_counter()
+        replies = self._execute([_command("GET", self._key(f"resp:{scope}:{version}:{intent}", text))])
+        tier = self.tiers["response"]
+        if replies is None:
+            tier.record_error()
+            return None
+        tier.record(replies[0] is not None, 1, (time.perf_counter() - started) * 1000)
+        return replies[0].decode("utf-8") if replies[0] is not None else None
+
+    def set_response(self, scope, version, intent, text, response):
+        self._execute([_command("SET", self._key(f"resp:{scope}:{version}:{intent}", text), response,
+                                "EX", self.response_ttl)])
+
+    def stats(self):
+        return {
+            "server": f"{self.host}:{self.port}",
+            "breaker": self.breaker.state,
+            "connections": self._opened,
+            **{kind: tier.stats() for kind, tier in self.tiers.items()},
+        }
+
+    def close(self):
+        while True:
+            try:
+                self._discard(self._pool.get_nowait())
+            except queue.Empty:
+                break
+
+class _Status(bytes):
+    """Simple-string reply (+OK), as opposed to a stored value"""
+
+class LocalKVServer:
+    """Minimal RESP server (GET/SET/MGET/DEL/DBSIZE/FLUSHDB/PING) with expiry, run on a background thread"""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.port = port
+        self._data = {}  # key -> (value, expires_at or None)
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(asyncio.start_server(self._serve, self.host, self.port))
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="local-kv-server", daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.port
+
+    def stop(self):
+        if self._loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            connections = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for task in connections:
+                task.cancel()
+            await asyncio.gather(*connections, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(timeout=5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+
+    def _get(self, key):
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and expires <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    def _handle(self, args):
+        name = args[0].upper()
+        if name == b"GET":
+            return self._get(args[1])
+        if name == b"MGET":
+            return [self._get(key) for key in args[1:]]
+        if name == b"SET":
+            expires = None
+            options = [a.upper() for a in args[3:]]
+            if b"EX" in options:
+                expires = time.monotonic() + float(args[3 + options.index(b"EX") + 1])
+            elif b"PX" in options:
+                expires = time.monotonic() + float(args[3 + options.index(b"PX") + 1]) / 1000
+            self._data[args[1]] = (args[2], expires)
+            return _Status(b"OK")
+        if name == b"DEL":
+            return sum(self._data.pop(key, None) is not None for key in args[1:])
+        if name == b"DBSIZE":
+            return len(self._data)
+        if name == b"FLUSHDB":
+            self._data.clear()
+            return _Status(b"OK")
+        if name == b"PING":
+            return _Status(b"PONG")
+        return ValueError(f"ERR unknown command '{name.decode()}'")
+
+    @staticmethod
+    def _encode(value):
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, ValueError):
+            return b"-" + str(value).encode() + b"\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b"".join(LocalKVServer._encode(v) for v in value)
+        if isinstance(value, _Status):
+            return b"+" + value + b"\r\n"
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                header = await reader.readline()
+                if not header:
+                    break
+                args = []
+                for _ in range(int(header[1:-2])):
+                    length = int((await reader.readline())[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                writer.write(self._encode(self._handle(args)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError, asyncio.CancelledError):
+            pass  # cancelled on stop(): end the connection quietly
+        finally:
+            writer.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared cache tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    serve = sub.add_parser("serve", help="Run the local stand-in key-value server")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=6380)
+    args = parser.parse_args()
+
+    server = LocalKVServer(args.host, args.port)
+    print(f"✅ Local shared cache listening on {args.host}:{server.start()}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import asyncio
+import re
+
+from starlette.concurrency import run_in_threadpool
+
+from app.utterance import FLIGHT_NUMBER_PATTERN
+
+_WHITESPACE = re.compile(r"\s+")
+
+def coalesce_key(message, *context):
+    """Key identical messages together; case only matters when it changes routing (flight numbers)"""
+    text = _WHITESPACE.sub(" ", message).strip()
+    if not FLIGHT_NUMBER_PATTERN.search(text):
+        text = text.lower()
+    return (text,) + context
+
+class SingleFlight:
+    """Runs one computation per key at a time; concurrent callers share its result"""
+
+    def __init__(self):
+        self._inflight = {}
+        self.leaders = 0
+        self.followers = 0
+        self.errors = 0
+
+    async def run(self, key, func, *args):
+        """Call func(*args) in the threadpool, or wait on the identical call already running"""
+        task = self._inflight.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(run_in_threadpool(func, *args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, key=key: self._done(key, t))
+        else:
+            self.followers += 1
+        # Shield: a caller that disconnects stops waiting, but the shared work carries on for the rest
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Errors are not remembered; the next caller simply retries
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self):
+        total = self.leaders + self.followers
+        return {
+            "in_flight": len(self._inflight),
+            "computed": self.leaders,
+            "deduplicated": self.followers,
+            "dedup_rate": round(self.followers / total, 4) if total else 0.0,
+            "errors": self.errors,
+        }
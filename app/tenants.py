@@ -0,0 +1,185 @@
+import json
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from app.chatbot import AirlineChatbot
+
+DEFAULT_FILES = {
+    "responses_file": "app/responses.json",
+    "policy_file": "app/airline_policy.json",
+    "intents_file": "data/sample_intents.json",
+}
+
+# Per-vector cost of a Chroma collection beyond the float32 embedding: HNSW links, id and metadata
+VECTOR_OVERHEAD_BYTES = 256
+
+def _deep_sizeof(obj, seen=None):
+    """Approximate retained size of an object graph in bytes"""
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    nbytes = getattr(obj, "nbytes", None)  # numpy arrays
+    if isinstance(nbytes, int):
+        return nbytes
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_sizeof(k, seen) + _deep_sizeof(v, seen) for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_sizeof(item, seen) for item in obj)
+    elif hasattr(obj, "__dict__"):
+        size += _deep_sizeof(vars(obj), seen)
+    elif hasattr(obj, "__slots__"):
+        size += sum(_deep_sizeof(getattr(obj, name), seen) for name in obj.__slots__ if hasattr(obj, name))
+    return size
+
+class TenantRegistry:
+    """Per-airline chatbots built lazily on first use and evicted LRU under a memory budget"""
+
+    def __init__(self, tenants, model, chroma_client=None, max_bytes=512 * 1024 * 1024, max_tenants=32,
+                 semantic_cache_factory=None, flight_data=None, lite=False, shared_cache=None):
+        self.tenants = {name: dict(DEFAULT_FILES, **files) for name, files in tenants.items()}
+        self.model = model
+        self.lite = lite
+        self.shared_cache = shared_cache
+        if lite:
+            self.chroma_client = None
+        else:
+            from app.vector_db import VectorDB
+            self.chroma_client = chroma_client or VectorDB().client
+        self.max_bytes = max_bytes
+        self.max_tenants = max_tenants
+        self.semantic_cache_factory = semantic_cache_factory
+        self.flight_data = flight_data
+
+        self._resident = OrderedDict()  # tenant -> {"bot", "bytes", "loaded_at"}, least recent first
+        self._lock = threading.Lock()
+        self._build_locks = {name: threading.Lock() for name in self.tenants}
+        self._stats = {name: {"requests": 0, "hits": 0, "loads": 0, "evictions": 0, "load_ms": 0.0}
+                       for name in self.tenants}
+
+    @classmethod
+    def from_file(cls, path, model, **kwargs):
+        with open(path) as f:
+            return cls(json.load(f), model, **kwargs)
+
+    def __contains__(self, tenant):
+        return tenant in self.tenants
+
+    def get(self, tenant):
+        """Return the tenant's chatbot, building it if it isn't resident"""
+        if tenant not in self.tenants:
+            raise KeyError(tenant)
+        with self._lock:
+            stats = self._stats[tenant]
+            stats["requests"] += 1
+            entry = self._resident.get(tenant)
+            if entry is not None:
+                self._resident.move_to_end(tenant)
+                stats["hits"] += 1
+                return entry["bot"]
+
+        # Build outside the registry lock so other tenants keep serving
+        with self._build_locks[tenant]:
+            with self._lock:
+                entry = self._resident.get(tenant)
+                if entry is not None:
+                    return entry["bot"]
+            started = time.perf_counter()
+            bot = self._build(tenant)
+            load_ms = (time.perf_counter() - started) * 1000
+            size = self._tenant_bytes(bot)
+            with self._lock:
+                self._resident[tenant] = {"bot": bot, "bytes": size, "loaded_at": time.time()}
+                stats = self._stats[tenant]
+                stats["loads"] += 1
+                stats["load_ms"] = round(load_ms, 2)
+                self._evict()
+            return bot
+
+    def _build(self, tenant):
+        files = self.tenants[tenant]
+        if self.lite:
+            db = None
+        else:
+            from app.vector_db import VectorDB
+            collection = "intent_vectors_" + re.sub(r"[^A-Za-z0-9_-]", "_", tenant)
+            db = VectorDB(collection_name=collection, client=self.chroma_client)
+        return AirlineChatbot(
+            policy_file=files["policy_file"],
+            intents_file=files["intents_file"],
+            responses_file=files["responses_file"],
+            semantic_cache=self.semantic_cache_factory() if self.semantic_cache_factory else None,
+            model=self.model,
+            flight_data=self.flight_data,
+            db=db,
+            lite=self.lite,
+            shared_cache=self.shared_cache,
+            cache_scope=tenant
+        )
+
+    def _tenant_bytes(self, bot):
+        """Memory the tenant's chatbot holds on its own, including its Chroma collection"""
+        # Objects every tenant shares are not freed by evicting one of them
+        seen = {id(obj) for obj in (self.model, self.flight_data, self.shared_cache, self.chroma_client)
+                if obj is not None}
+        size = _deep_sizeof((bot.enhanced_ai_generator, bot.policy_table, bot.semantic_cache, bot.classifier), seen)
+        return size + self._collection_bytes(bot.db)
+
+    @staticmethod
+    def _collection_bytes(db):
+        """Estimate of a collection's footprint from its vector count and dimension"""
+        if db is None:
+            return 0
+        count = db.collection.count()
+        if not count:
+            return 0
+        sample = db.collection.get(limit=1, include=["embeddings"])["embeddings"]
+        return count * (len(sample[0]) * 4 + VECTOR_OVERHEAD_BYTES)
+
+    def _evict(self):
+        """Drop least recently used tenants until within budget; the newest always stays
+
+        Runs under the registry lock, so a rebuild of an evicted tenant starts only after its
+        collection is gone. A request still holding the evicted chatbot loses its vector search.
+        """
+        while len(self._resident) > 1 and (
+                len(self._resident) > self.max_tenants or self.resident_bytes() > self.max_bytes):
+            tenant, entry = self._resident.popitem(last=False)
+            self._stats[tenant]["evictions"] += 1
+            self._drop_collection(entry["bot"])
+
+    def _drop_collection(self, bot):
+        """Delete the tenant's collection so Chroma frees its index and data under data/chroma_*"""
+        if bot.db is None:
+            return
+        try:
+            self.chroma_client.delete_collection(bot.db.collection_name)
+        except Exception as e:  # already gone; eviction must not fail the request that triggered it
+            print(f"❌ Could not delete collection {bot.db.collection_name}: {e}")
+
+    def resident_bytes(self):
+        return sum(entry["bytes"] for entry in self._resident.values())
+
+    def stats(self):
+        with self._lock:
+            tenants = {}
+            for name, stats in self._stats.items():
+                entry = self._resident.get(name)
+                tenants[name] = dict(
+                    stats,
+                    resident=entry is not None,
+                    memory_bytes=entry["bytes"] if entry else 0,
+                    hit_rate=round(stats["hits"] / stats["requests"], 4) if stats["requests"] else 0.0
+                )
+            return {
+                "resident": list(self._resident),
+                "resident_bytes": self.resident_bytes(),
+                "max_bytes": self.max_bytes,
+                "max_tenants": self.max_tenants,
+                "tenants": tenants,
+            }
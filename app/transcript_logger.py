@@ -0,0 +1,157 @@
+import gzip
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+_SHUTDOWN = object()
+
+class TranscriptLogger:
+    """Background writer for chat turns: bounded queue in, rotated gzip JSONL files out"""
+
+    def __init__(self, directory="logs/transcripts", max_queue=10000, batch_size=256, flush_interval=1.0,
+                 max_file_bytes=64 * 1024 * 1024, rotate_seconds=3600, policy="drop", block_timeout=0.005):
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_file_bytes = max_file_bytes
+        self.rotate_seconds = rotate_seconds
+        self.policy = policy
+        self.block_timeout = block_timeout
+        os.makedirs(directory, exist_ok=True)
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._file = None
+        self._raw = None
+        self._path = None
+        self._opened_at = 0.0
+        self._sequence = 0
+
+        # Request threads and the writer both update the counters
+        self._counter_lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.dropped = 0
+        self.files = 0
+        self.last_lag_ms = 0.0
+        self.max_lag_ms = 0.0
+
+        self._thread = threading.Thread(target=self._run, name="transcript-logger", daemon=True)
+        self._thread.start()
+
+    def log(self, record):
+        """Queue one turn; never touches the disk on the caller's thread
+
+        With policy="block" this can wait up to block_timeout for room, so call it from a
+        worker thread rather than the event loop.
+        """
+        item = (time.time(), record)
+        try:
+            if self.policy == "block":
+                # Brief backpressure, then give up rather than stall the request
+                self._queue.put(item, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(item)
+        except queue.Full:
+            with self._counter_lock:
+                self.dropped += 1
+            return False
+        with self._counter_lock:
+            self.enqueued += 1
+        return True
+
+    def log_turn(self, message, reply, timings=None, tenant=None):
+        """Log a turn in the app/responses.json shape plus routing details"""
+        return self.log({
+            "tenant": tenant,
+            "customer_message": message,
+            "intent": reply.get("intent"),
+            "bot_response": reply.get("response"),
+            "tone": reply.get("tone"),
+            "confidence": reply.get("confidence"),
+            "degradation": reply.get("degradation"),
+            "timings_ms": timings if timings is not None else reply.get("timings"),
+        })
+
+    def _open(self, now):
+        self._sequence += 1
+        stamp = datetime.fromtimestamp(now).strftime("%Y%m%d-%H%M%S")
+        self._path = os.path.join(self.directory, f"transcripts-{stamp}-{os.getpid()}-{self._sequence}.jsonl.gz")
+        self._raw = open(self._path, "ab")
+        self._file = gzip.GzipFile(fileobj=self._raw, mode="ab")
+        self._opened_at = now
+        self.files += 1
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+            self._raw.close()
+            self._file = self._raw = None
+
+    def _write(self, batch):
+        now = time.time()
+        if self._file is not None and (self._raw.tell() >= self.max_file_bytes
+                                       or now - self._opened_at >= self.rotate_seconds):
+            self._close()
+        if self._file is None:
+            self._open(now)
+
+        lines = []
+        for queued_at, record in batch:
+            record = dict(record, ts=queued_at)
+            lines.append(json.dumps(record, ensure_ascii=False))
+        self._file.write(("\n".join(lines) + "\n").encode("utf-8"))
+        # Sync-flush so readers can decompress everything written so far
+        self._file.flush()
+
+        lag_ms = (time.time() - batch[0][0]) * 1000
+        with self._counter_lock:
+            self.last_lag_ms = lag_ms
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            self.written += len(batch)
+
+    def _run(self):
+        batch = []
+        deadline = time.time() + self.flush_interval
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.time()))
+                if item is _SHUTDOWN:
+                    stopping = True
+                else:
+                    batch.append(item)
+            except queue.Empty:
+                pass
+            if batch and (stopping or len(batch) >= self.batch_size or time.time() >= deadline):
+                try:
+                    self._write(batch)
+                except OSError as e:
+                    with self._counter_lock:
+                        self.dropped += len(batch)
+                    print(f"❌ Transcript write failed: {e}")
+                batch = []
+            if time.time() >= deadline:
+                deadline = time.time() + self.flush_interval
+        self._close()
+
+    def close(self, timeout=10):
+        """Drain the queue, flush and close the current file"""
+        if self._thread.is_alive():
+            self._queue.put(_SHUTDOWN)
+            self._thread.join(timeout)
+
+    def stats(self):
+        with self._counter_lock:
+            return {
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "dropped": self.dropped,
+                "queued": self._queue.qsize(),
+                "files": self.files,
+                "current_file": self._path,
+                "last_lag_ms": round(self.last_lag_ms, 2),
+                "max_lag_ms": round(self.max_lag_ms, 2),
+            }
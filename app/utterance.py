@@ -0,0 +1,77 @@
+import re
+
+# Booking reference patterns, tried in priority order
+BOOKING_PATTERNS = [re.compile(p, re.IGNORECASE) for p in [
+    r'booking\s+(?:reference|ref|number|id)\s*:?\s*([A-Z0-9]+)',
+    r'confirmation\s+(?:number|id)\s*:?\s*([A-Z0-9]+)',
+    r'ticket\s+(?:number|id)\s*:?\s*([A-Z0-9]+)',
+    r'pnr\s*:?\s*([A-Z0-9]+)',
+    r'flight\s+(?:number|no)\s*:?\s*([A-Z0-9]+)',
+    r'\b([A-Z]{2,3}\d{3,4})\b',  # Flight number pattern (2-3 letters + 3-4 digits) - matches UA1033
+    r'\b([A-Z]{1,3}\d{3,6})\b',  # Alternative flight number pattern
+]]
+
+# Case-sensitive flight number, as typed by the customer
+FLIGHT_NUMBER_PATTERN = re.compile(r'\b[A-Z]{2,3}\d{3,4}\b')
+
+CITIES = ("New York", "Los Angeles", "London", "Paris", "Tokyo", "Dubai", "Singapore", "Hong Kong")
+_CITIES_LOWER = tuple((city, city.lower()) for city in CITIES)
+
+def extract_booking_info(text):
+    """Extract booking information from raw text"""
+    for pattern in BOOKING_PATTERNS:
+        match = pattern.search(text)
+        if match:
+            return match.group(1)
+    return None
+
+def extract_destination(lower):
+    """Extract a known destination city from lowercased text"""
+    for city, city_lower in _CITIES_LOWER:
+        if city_lower in lower:
+            return city
+    return None
+
+class Utterance:
+    """A customer message preprocessed once and shared by every pipeline stage"""
+
+    __slots__ = ("text", "lower", "booking_info", "destination", "flight_number",
+                 "_embedder", "_embedding")
+
+    def __init__(self, text, embedder=None):
+        lower = text.lower()
+        flight_number = FLIGHT_NUMBER_PATTERN.search(text)
+
+        setattr_ = object.__setattr__
+        setattr_(self, "text", text)
+        setattr_(self, "lower", lower)
+        setattr_(self, "booking_info", extract_booking_info(text))
+        setattr_(self, "destination", extract_destination(lower))
+        setattr_(self, "flight_number", flight_number.group(0) if flight_number else None)
+        setattr_(self, "_embedder", embedder)
+        setattr_(self, "_embedding", None)
+
+    @classmethod
+    def of(cls, message, embedder=None):
+        """Return message unchanged if it is already an Utterance"""
+        if isinstance(message, cls):
+            return message
+        return cls(message, embedder)
+
+    @property
+    def embedding(self):
+        """Embedding of the text, computed on first access"""
+        if self._embedding is None:
+            if self._embedder is None:
+                raise ValueError("Utterance has no embedder")
+            object.__setattr__(self, "_embedding", self._embedder(self.text))
+        return self._embedding
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Utterance is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Utterance is immutable")
+
+    def __repr__(self):
+        return f"Utterance({self.text!r})"
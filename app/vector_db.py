@@ -2,9 +2,10 @@ import chromadb
 from chromadb.config import Settings
 
 class VectorDB:
-    def __init__(self, path="data/chroma_airline"):
-        self.client = chromadb.PersistentClient(path=path)
-        self.collection_name = "intent_vectors"
+    def __init__(self, path="data/chroma_airline", collection_name="intent_vectors", client=None):
+        # Pass client to share one Chroma store between several collections
+        self.client = client or chromadb.PersistentClient(path=path)
+        self.collection_name = collection_name
         
         # Get or create collection
         try:
@@ -15,18 +16,31 @@ class VectorDB:
                 metadata={"description": "Intent vectors for airline chatbot"}
             )
 
-    def insert(self, vectors):
-        # Generate unique IDs for the vectors
+    def insert(self, vectors, ids=None, metadatas=None):
+        # Generate unique IDs for the vectors unless the caller supplies stable ones
         import uuid
-        ids = [str(uuid.uuid4()) for _ in vectors]
+        if ids is None:
+            ids = [str(uuid.uuid4()) for _ in vectors]
         
         # Insert vectors into ChromaDB
-        self.collection.add(
+        self.collection.upsert(
             embeddings=vectors,
-            ids=ids
+            ids=ids,
+            metadatas=metadatas
         )
         return ids
 
+    def ids(self):
+        """Return the ids of every vector currently stored"""
+        return set(self.collection.get(include=[])["ids"])
+
+    def delete(self, ids):
+        """Delete vectors by id"""
+        ids = list(ids)
+        if ids:
+            self.collection.delete(ids=ids)
+        return ids
+
     def search(self, query_vec, limit=2):
         # Search for similar vectors
         results = self.collection.query(
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+ASAAP Autotuning Script
+Sweeps torch threads, uvicorn workers and encode batch size on this host and
+writes the best combination to autotune.json, which deploy.sh/deploy.bat read
+"""
+
+import argparse
+import json
+import os
+import platform
+import queue
+import statistics
+import threading
+import time
+from datetime import datetime
+
+DEFAULT_OUTPUT = "autotune.json"
+
+def _candidates(limit):
+    """1, 2, 4, ... up to limit, plus limit itself"""
+    values = []
+    n = 1
+    while n < limit:
+        values.append(n)
+        n *= 2
+    values.append(limit)
+    return values
+
+def _load_messages():
+    with open("app/responses.json") as f:
+        return [entry["customer_message"] for entry in json.load(f)]
+
+def _summarize(latencies_ms, elapsed_s):
+    if not latencies_ms:
+        return {"requests": 0, "throughput_rps": 0.0, "p50_ms": None, "p99_ms": None}
+    ordered = sorted(latencies_ms)
+    return {
+        "requests": len(ordered),
+        "throughput_rps": round(len(ordered) / elapsed_s, 2),
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 3),
+    }
+
+def _worker(thread_values, duration, barrier, results):
+    """One simulated uvicorn worker: full AirlineChatbot pipeline in a closed loop, once per thread setting"""
+    try:
+        import torch
+        from app.chatbot import AirlineChatbot
+        from app.model_utils import AirlineModel
+
+        # Caches off, so every request pays for the real pipeline
+        bot = AirlineChatbot(model=AirlineModel(embedding_cache_size=0))
+        messages = _load_messages()
+        for message in messages[:20]:
+            bot.get_reply(message)
+
+        for threads in thread_values:
+            torch.set_num_threads(threads)
+            barrier.wait()
+            latencies = []
+            i = 0
+            started = time.perf_counter()
+            deadline = started + duration
+            while time.perf_counter() < deadline:
+                t0 = time.perf_counter()
+                bot.get_reply(messages[i % len(messages)])
+                latencies.append((time.perf_counter() - t0) * 1000)
+                i += 1
+            results.put((threads, latencies, time.perf_counter() - started))
+    except threading.BrokenBarrierError:
+        return  # another worker failed and aborted the barrier; the parent reports it
+    except Exception as e:
+        # Release the other workers and tell the parent before exiting
+        barrier.abort()
+        results.put(("error", f"{type(e).__name__}: {e}"))
+        raise
+
+class ASAAPAutotuner:
+    def __init__(self, thread_values, worker_values, batch_values, duration=10.0, p99_target_ms=None,
+                 allow_oversubscribe=False):
+        self.cpus = os.cpu_count() or 1
+        self.thread_values = thread_values
+        self.worker_values = worker_values
+        self.batch_values = batch_values
+        self.duration = duration
+        self.p99_target_ms = p99_target_ms
+        self.allow_oversubscribe = allow_oversubscribe
+
+    def log(self, message):
+        print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+    def sweep_pipeline(self):
+        """Throughput and p99 for every (workers, threads) combination"""
+        import multiprocessing
+
+        ctx = multiprocessing.get_context("spawn")
+        combos = []
+        for workers in self.worker_values:
+            threads = [t for t in self.thread_values
+                       if self.allow_oversubscribe or t * workers <= self.cpus]
+            if not threads:
+                continue
+            self.log(f"Starting {workers} worker(s); thread settings {threads}")
+            barrier = ctx.Barrier(workers)
+            results = ctx.Queue()
+            procs = [ctx.Process(target=_worker, args=(threads, self.duration, barrier, results))
+                     for _ in range(workers)]
+            for proc in procs:
+                proc.start()
+
+            try:
+                by_threads = self._collect(procs, barrier, results, threads)
+            except RuntimeError as e:
+                self.log(f"workers={workers} failed ({e}); skipping")
+                continue
+            finally:
+                for proc in procs:
+                    proc.join(timeout=5)
+                    if proc.is_alive():
+                        proc.terminate()
+                        proc.join()
+
+            for t in threads:
+                latencies, elapsed = by_threads[t]
+                result = dict(_summarize(latencies, elapsed), workers=workers, torch_threads=t)
+                combos.append(result)
+                self.log(f"workers={workers} threads={t}: {result['throughput_rps']} req/s, p99 {result['p99_ms']} ms")
+        return combos
+
+    @staticmethod
+    def _collect(procs, barrier, results, threads, poll_s=1.0):
+        """Merge the workers' latencies per thread setting; raises RuntimeError if a worker dies"""
+        by_threads = {t: ([], 0.0) for t in threads}
+        pending = len(procs) * len(threads)
+        while pending:
+            try:
+                item = results.get(timeout=poll_s)
+            except queue.Empty:
+                # A worker killed outright (OOM, signal) never reports, so check on the processes
+                dead = [proc for proc in procs if proc.exitcode not in (None, 0)]
+                if dead or not any(proc.is_alive() for proc in procs):
+                    barrier.abort()
+                    raise RuntimeError(f"worker exited with code {dead[0].exitcode}" if dead
+                                       else "workers exited without reporting")
+                continue
+            if item[0] == "error":
+                barrier.abort()
+                raise RuntimeError(item[1])
+            t, latencies, elapsed = item
+            merged, longest = by_threads[t]
+            by_threads[t] = (merged + latencies, max(longest, elapsed))
+            pending -= 1
+        return by_threads
+
+    def sweep_batch_size(self, threads):
+        """Bulk encode throughput (reloads, warm-up) for each batch size"""
+        import torch
+        from app.model_utils import AirlineModel
+
+        torch.set_num_threads(threads)
+        model = AirlineModel(embedding_cache_size=0)
+        texts = _load_messages() * 4
+        model.get_embeddings(texts[:64], batch_size=32)
+        results = []
+        for batch_size in self.batch_values:
+            started = time.perf_counter()
+            model.get_embeddings(texts, batch_size=batch_size)
+            rate = len(texts) / (time.perf_counter() - started)
+            results.append({"encode_batch_size": batch_size, "texts_per_second": round(rate, 1)})
+            self.log(f"encode batch {batch_size}: {rate:.1f} texts/s")
+        return results
+
+    def pick(self, combos):
+        eligible = combos
+        if self.p99_target_ms is not None:
+            eligible = [c for c in combos if c["p99_ms"] is not None and c["p99_ms"] <= self.p99_target_ms]
+            if not eligible:
+                self.log(f"No combination meets p99 <= {self.p99_target_ms} ms; picking the lowest p99")
+                return min(combos, key=lambda c: c["p99_ms"] or float("inf"))
+        return max(eligible, key=lambda c: (c["throughput_rps"], -(c["p99_ms"] or 0)))
+
+    def run(self, output):
+        started = time.time()
+        combos = self.sweep_pipeline()
+        if not combos:
+            raise SystemExit("No combinations completed; check --threads/--workers against the CPU count "
+                             "and the worker errors above")
+        best = self.pick(combos)
+        batches = self.sweep_batch_size(best["torch_threads"])
+        best_batch = max(batches, key=lambda b: b["texts_per_second"])
+
+        config = {
+            "torch_threads": best["torch_threads"],
+            "workers": best["workers"],
+            "encode_batch_size": best_batch["encode_batch_size"],
+            "expected": {"throughput_rps": best["throughput_rps"], "p99_ms": best["p99_ms"]},
+            "host": {
+                "hostname": platform.node(),
+                "cpus": self.cpus,
+                "machine": platform.machine(),
+                "python": platform.python_version(),
+            },
+            "p99_target_ms": self.p99_target_ms,
+            "tuned_at": datetime.now().isoformat(timespec="seconds"),
+            "duration_s": round(time.time() - started, 1),
+            "pipeline_results": combos,
+            "batch_results": batches,
+        }
+        with open(output, "w") as f:
+            json.dump(config, f, indent=2)
+        self.log(f"Best: workers={config['workers']} threads={config['torch_threads']} "
+                 f"batch={config['encode_batch_size']} -> {output}")
+        return config
+
+def print_env(path):
+    """KEY=VALUE lines for the launchers; prints nothing if there is no tuned config"""
+    if not os.path.exists(path):
+        return
+    with open(path) as f:
+        config = json.load(f)
+    print(f"ASAAP_WORKERS={config['workers']}")
+    print(f"ASAAP_TORCH_THREADS={config['torch_threads']}")
+    print(f"ASAAP_ENCODE_BATCH_SIZE={config['encode_batch_size']}")
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="ASAAP Autotuner")
+    parser.add_argument("--threads", type=int, nargs="*", default=_candidates(cpus), help="torch intra-op thread counts to try")
+    parser.add_argument("--workers", type=int, nargs="*", default=_candidates(cpus), help="Worker process counts to try")
+    parser.add_argument("--batch-sizes", type=int, nargs="*", default=[8, 16, 32, 64, 128], help="Encode batch sizes to try")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of load per combination")
+    parser.add_argument("--p99-target-ms", type=float, help="Only accept combinations under this p99")
+    parser.add_argument("--allow-oversubscribe", action="store_true", help="Also try threads x workers > CPU count")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write the tuned config")
+    parser.add_argument("--print-env", action="store_true", help="Print the tuned config as KEY=VALUE lines and exit")
+    args = parser.parse_args()
+
+    if args.print_env:
+        print_env(args.output)
+        return
+
+    tuner = ASAAPAutotuner(args.threads, args.workers, args.batch_sizes, args.duration,
+                           args.p99_target_ms, args.allow_oversubscribe)
+    tuner.run(args.output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Response dataset loading benchmark
+Compares json.load of a whole array (records kept) with streaming a JSONL file into the tables,
+reporting load time and peak RSS growth at several dataset sizes
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app.enhanced_ai_generator import EnhancedAIResponseGenerator
+from app.response_dataset import iter_records
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def generate(base, rows, unique_share, json_path, jsonl_path):
+    """Synthetic corpus: dataset rows with unique messages and a share of unique responses"""
+    rng = random.Random(0)
+    with open(json_path, "w") as json_out, open(jsonl_path, "w") as jsonl_out:
+        json_out.write("[")
+        for i in range(rows):
+            record = dict(rng.choice(base))
+            record["customer_message"] = f"{record['customer_message']} #{i}"
+            if rng.random() < unique_share:
+                record["bot_response"] = f"{record['bot_response']} (ref {i})"
+            line = json.dumps(record)
+            json_out.write(("," if i else "") + line)
+            jsonl_out.write(line + "\n")
+        json_out.write("]")
+
+def load(mode, path):
+    """Runs in a fresh interpreter so peak RSS belongs to this load alone"""
+    before = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "json":
+        # Previous behaviour: parse everything and keep the records alongside the tables
+        with open(path) as f:
+            records = json.load(f)
+        tables = EnhancedAIResponseGenerator._build_tables(records)
+    else:
+        tables = EnhancedAIResponseGenerator._build_tables(iter_records(path))
+    elapsed = time.perf_counter() - start
+    print(json.dumps({"seconds": elapsed, "peak_mb": peak_rss_mb() - before, "rows": tables.record_count}))
+
+def run_case(mode, path):
+    out = subprocess.run([sys.executable, __file__, "--worker", mode, path],
+                         capture_output=True, text=True, check=True, cwd=ROOT)
+    return json.loads(out.stdout)
+
+def main():
+    parser = argparse.ArgumentParser(description="Response dataset loading benchmark")
+    parser.add_argument("--dataset", default="app/responses.json", help="Rows to sample from")
+    parser.add_argument("--sizes", default="10000,100000,1000000", help="Comma-separated row counts")
+    parser.add_argument("--unique-share", type=float, default=0.05, help="Share of rows with a unique response")
+    parser.add_argument("--worker", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        load(*args.worker)
+        return
+
+    base = list(iter_records(os.path.join(ROOT, args.dataset)))
+    print(f"{'rows':>10}{'json s':>10}{'json MB':>10}{'jsonl s':>10}{'jsonl MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in (int(size) for size in args.sizes.split(",")):
+            json_path = os.path.join(tmp, "responses.json")
+            jsonl_path = os.path.join(tmp, "responses.jsonl")
+            generate(base, rows, args.unique_share, json_path, jsonl_path)
+            legacy = run_case("json", json_path)
+            streamed = run_case("jsonl", jsonl_path)
+            print(f"{rows:>10}{legacy['seconds']:>10.2f}{legacy['peak_mb']:>10.1f}"
+                  f"{streamed['seconds']:>10.2f}{streamed['peak_mb']:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+RPC vs HTTP throughput benchmark
+Starts one server process exposing both /chat and the binary RPC port, then drives each path
+with the messages from app/responses.json
+
+    python benchmarks/bench_rpc.py                 # lite pipeline: transport overhead dominates
+    python benchmarks/bench_rpc.py --full          # full pipeline (needs the models)
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import requests
+
+from app.response_dataset import iter_records
+from app.rpc import CODEC_JSON, RPCClient
+
+def wait_ready(url, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+def drive(name, worker, clients, messages, duration):
+    """Closed loop: each client thread sends its next message as soon as the previous answer arrives"""
+    counts = [0] * clients
+    stop = time.perf_counter() + duration
+
+    def loop(index):
+        done = 0
+        call = worker()
+        while time.perf_counter() < stop:
+            done += call(messages[(index + done) % len(messages)])
+        counts[index] = done
+
+    threads = [threading.Thread(target=loop, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    rate = sum(counts) / (time.perf_counter() - started)
+    print(f"{name:<28}{rate:>12.0f} msg/s")
+    return rate
+
+def main():
+    parser = argparse.ArgumentParser(description="RPC vs HTTP throughput")
+    parser.add_argument("--full", action="store_true", help="Use the full pipeline instead of lite mode")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=5.0)
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--http-port", type=int, default=8765)
+    parser.add_argument("--rpc-port", type=int, default=9765)
+    args = parser.parse_args()
+
+    messages = [entry["customer_message"] for entry in iter_records(os.path.join(ROOT, "app/responses.json"))]
+    env = dict(os.environ, ASAAP_RPC_PORT=str(args.rpc_port), ASAAP_TRANSCRIPTS="0",
+               ASAAP_COALESCE="0", ASAAP_WARMUP="0", ASAAP_LITE="0" if args.full else "1")
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.http_port), "--log-level", "warning"],
+        cwd=ROOT, env=env
+    )
+    try:
+        base = f"http://127.0.0.1:{args.http_port}"
+        wait_ready(base + "/ready")
+
+        def http_worker():
+            session = requests.Session()  # keep-alive, as internal callers use it
+            return lambda m: session.post(base + "/chat", data={"message": m}).json() and 1
+
+        def rpc_worker(codec=None):
+            def make():
+                client = RPCClient(port=args.rpc_port, codec=codec)
+                return lambda m: client.chat(m) and 1
+            return make
+
+        def rpc_batch_worker():
+            client = RPCClient(port=args.rpc_port)
+            def call(m):
+                start = messages.index(m)
+                return len(client.batch((messages * 2)[start:start + args.batch]))
+            return call
+
+        def rpc_stream_worker():
+            client = RPCClient(port=args.rpc_port)
+            def call(m):
+                start = messages.index(m)
+                return sum(1 for _ in client.stream((messages * 2)[start:start + args.batch]))
+            return call
+
+        print(f"{args.clients} clients, {args.duration:.0f}s each, {'full' if args.full else 'lite'} pipeline")
+        results = {
+            "http_form_json": drive("HTTP /chat (keep-alive)", http_worker, args.clients, messages, args.duration),
+            "rpc_unary_json": drive("RPC unary (JSON)", rpc_worker(CODEC_JSON), args.clients, messages, args.duration),
+            "rpc_unary": drive("RPC unary", rpc_worker(), args.clients, messages, args.duration),
+            "rpc_stream": drive(f"RPC stream ({args.batch} in flight)", rpc_stream_worker, args.clients, messages, args.duration),
+            "rpc_batch": drive(f"RPC batch ({args.batch})", rpc_batch_worker, args.clients, messages, args.duration),
+        }
+        print(json.dumps({k: round(v / results["http_form_json"], 2) for k, v in results.items()}))
+    finally:
+        server.terminate()
+        server.wait()
+
+if __name__ == "__main__":
+    main()
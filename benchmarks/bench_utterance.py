@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Utterance preprocessing benchmark
+Compares the old per-stage rescanning of a message with one shared Utterance
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utterance import Utterance, CITIES
+
+LEGACY_PATTERNS = [
+    r'booking\s+(?:reference|ref|number|id)\s*:?\s*([A-Z0-9]+)',
+    r'confirmation\s+(?:number|id)\s*:?\s*([A-Z0-9]+)',
+    r'ticket\s+(?:number|id)\s*:?\s*([A-Z0-9]+)',
+    r'pnr\s*:?\s*([A-Z0-9]+)',
+    r'flight\s+(?:number|no)\s*:?\s*([A-Z0-9]+)',
+    r'\b([A-Z]{2,3}\d{3,4})\b',
+    r'\b([A-Z]{1,3}\d{3,6})\b',
+]
+
+def legacy_booking_info(user_input):
+    for pattern in LEGACY_PATTERNS:
+        match = re.search(pattern, user_input, re.IGNORECASE)
+        if match:
+            return match.group(1)
+    return None
+
+def legacy_destination(user_input):
+    for city in CITIES:
+        if city.lower() in user_input.lower():
+            return city
+    return None
+
+def legacy_request(message):
+    """Preprocessing work one request used to do before Utterance"""
+    message.lower()                                         # AirlineChatbot.get_response
+    re.search(r'\b[A-Z]{2,3}\d{3,4}\b', message)            # flight number rule
+    message.lower()                                         # generate_response
+    message.lower()                                         # _map_to_dataset_intent
+    legacy_booking_info(message)                            # _enhance_response / status / cancellation
+    legacy_destination(message)                             # _enhance_response / booking
+    legacy_booking_info(message)
+
+def utterance_request(message):
+    """Preprocessing work one request does with a shared Utterance"""
+    utterance = Utterance(message)
+    utterance.lower, utterance.flight_number
+    utterance.booking_info, utterance.destination, utterance.booking_info
+
+def measure(func, messages, rounds):
+    for message in messages:  # warm-up (regex cache, interning)
+        func(message)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for message in messages:
+            func(message)
+    elapsed = time.perf_counter() - start
+
+    # Transient allocation high-water mark of each request, averaged
+    tracemalloc.start()
+    peak_total = 0
+    for message in messages:
+        baseline, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func(message)
+        _, peak = tracemalloc.get_traced_memory()
+        peak_total += peak - baseline
+    tracemalloc.stop()
+
+    requests = rounds * len(messages)
+    return {
+        "us_per_request": elapsed / requests * 1e6,
+        "peak_bytes_per_request": peak_total / len(messages),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Utterance preprocessing benchmark")
+    parser.add_argument("--dataset", default="app/responses.json", help="Dataset to draw messages from")
+    parser.add_argument("--rounds", type=int, default=20, help="Passes over the dataset")
+    args = parser.parse_args()
+
+    with open(args.dataset) as f:
+        messages = [entry["customer_message"] for entry in json.load(f)]
+
+    legacy = measure(legacy_request, messages, args.rounds)
+    shared = measure(utterance_request, messages, args.rounds)
+
+    print(f"{'':<12}{'us/request':>14}{'peak bytes/request':>22}")
+    for name, result in (("legacy", legacy), ("utterance", shared)):
+        print(f"{name:<12}{result['us_per_request']:>14.2f}{result['peak_bytes_per_request']:>22.1f}")
+    saving = 1 - shared["us_per_request"] / legacy["us_per_request"]
+    print(f"Per-request preprocessing time saved: {saving * 100:.1f}%")
+
+if __name__ == "__main__":
+    main()
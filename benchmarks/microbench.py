@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+ASAAP Microbenchmarks
+Times the /chat hot functions in isolation and compares them with stored baselines
+
+    python benchmarks/microbench.py run               # measure and print
+    python benchmarks/microbench.py run --save        # measure and store as the new baseline
+    python benchmarks/microbench.py compare           # measure and flag regressions (exit code 1)
+
+Baselines record CPU, Python version and embedder; compare refuses (exit code 2) to judge a
+run against a baseline from a different environment unless --force is given. Timings are
+compared relative to a calibration workload run next to each benchmark, and a benchmark is
+only flagged when both its median and its fastest pass slow down by more than the noise seen
+in the baseline and in the current run.
+"""
+
+import argparse
+import atexit
+import hashlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+# Benchmarks never download models; a locally cached copy is used if present
+os.environ.setdefault("HF_HUB_OFFLINE", "1")
+
+BASELINE_FILE = os.path.join("benchmarks", "baselines.json")
+EMBEDDING_DIM = 384
+
+class HashingEmbedder:
+    """Offline stand-in for SentenceTransformer: deterministic hashed bag-of-words vectors"""
+
+    def encode(self, texts, batch_size=32):
+        import numpy as np
+        vectors = np.zeros((len(texts), EMBEDDING_DIM), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in text.lower().split():
+                digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+                index = int.from_bytes(digest[:4], "little") % EMBEDDING_DIM
+                vectors[row, index] += 1.0 if digest[4] & 1 else -1.0
+            norm = np.linalg.norm(vectors[row])
+            if norm:
+                vectors[row] /= norm
+        return vectors
+
+def load_model(mock):
+    """Embedding-only AirlineModel with the cached MiniLM embedder, or the hashing stand-in when offline"""
+    from app.model_utils import AirlineModel
+    embedder, name = None, "hashing-mock"
+    if not mock:
+        try:
+            from sentence_transformers import SentenceTransformer
+            embedder, name = SentenceTransformer('all-MiniLM-L6-v2'), "all-MiniLM-L6-v2"
+        except Exception as e:
+            print(f"Embedding model not cached locally ({e.__class__.__name__}); using hashing embedder")
+    # No embedding cache: time the encoder, not the cache
+    model = AirlineModel(batched_generation=False, embedding_cache_size=0,
+                         embedder=embedder or HashingEmbedder(), with_generator=False)
+    return model, name
+
+def cpu_model():
+    """CPU model name; platform.processor() is often empty or just the architecture on Linux"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            for line in f:
+                if line.startswith("model name"):
+                    return line.split(":", 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+# Baselines are only comparable when measured in the same environment
+# (the host name is recorded for reference only: identical machines should compare fine)
+ENVIRONMENT_KEYS = ("cpu", "cpu_count", "python", "embedder")
+
+def environment_mismatches(current, baseline):
+    """(key, baseline value, current value) for every environment field that differs"""
+    return [
+        (key, baseline["meta"].get(key), current["meta"].get(key))
+        for key in ENVIRONMENT_KEYS
+        if baseline["meta"].get(key) != current["meta"].get(key)
+    ]
+
+def load_messages(limit):
+    with open("app/responses.json") as f:
+        messages = list(dict.fromkeys(entry["customer_message"] for entry in json.load(f)))
+    return messages[:limit] if limit else messages
+
+def build_cases(model, messages):
+    """name -> (callable taking one message, inputs)"""
+    from app.chatbot import AirlineChatbot
+    from app.enhanced_ai_generator import EnhancedAIResponseGenerator
+    from app.utterance import Utterance
+    from app.vector_db import VectorDB
+
+    generator = EnhancedAIResponseGenerator()
+    bot = AirlineChatbot(lite=True)  # detect_intent needs no embedding model, GPT-2 or vector DB
+    intents = {message: bot.detect_intent(message) for message in messages}
+    embeddings = {message: model.get_embedding(message) for message in messages}
+
+    db_path = tempfile.mkdtemp(prefix="asaap-bench-")
+    atexit.register(shutil.rmtree, db_path, ignore_errors=True)
+    db = VectorDB(path=db_path)
+    with open("data/sample_intents.json") as f:
+        examples = [ex for item in json.load(f) for ex in item["examples"]]
+    db.insert([list(map(float, v)) for v in model.get_embeddings(examples)])
+
+    return {
+        "utterance": (lambda m: Utterance(m), messages),
+        "extract_booking_info": (generator._extract_booking_info, messages),
+        "map_to_dataset_intent": (lambda m: generator._map_to_dataset_intent(intents[m], m), messages),
+        "detect_intent": (bot.detect_intent, messages),
+        "generate_response": (lambda m: generator.generate_response(intents[m], m), messages),
+        "vector_search": (lambda m: db.search([embeddings[m]]), messages),
+        "get_embedding": (model.get_embedding, messages),
+    }
+
+def time_passes(func, inputs, warmup, repeat):
+    """Per-call time of each of `repeat` passes over the inputs, in microseconds"""
+    for _ in range(warmup):
+        for item in inputs:
+            func(item)
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for item in inputs:
+            func(item)
+        samples.append((time.perf_counter_ns() - start) / len(inputs) / 1000)
+    return samples
+
+def calibration(_):
+    """Fixed pure-Python workload; timings are also reported relative to it"""
+    text = "my booking reference is ABC123 for the flight to paris"
+    total = 0
+    for i in range(200):
+        total += len(text.split()) + text.find("paris") + (i * i) % 7
+    return total
+
+def summarize(samples, relative, round_medians, calls):
+    """Median/min/MAD over every pass, the same relative to the calibration workload, and how far
+    the per-round relative medians drifted apart"""
+    median = statistics.median(samples)
+    relative_median = statistics.median(relative)
+    return {
+        "median_us": round(median, 3),
+        "min_us": round(min(samples), 3),
+        "mad_us": round(statistics.median(abs(s - median) for s in samples), 3),
+        "relative": round(relative_median, 5),
+        "relative_min": round(min(relative), 5),
+        "relative_mad": round(statistics.median(abs(r - relative_median) for r in relative), 5),
+        "round_spread": round((max(round_medians) - min(round_medians)) / relative_median, 4),
+        "calls": calls,
+    }
+
+def run(args):
+    model, embedder = load_model(args.mock_models)
+    messages = load_messages(args.limit)
+    cases = build_cases(model, messages)
+    if args.only:
+        cases = {name: case for name, case in cases.items() if name in args.only}
+
+    # Rounds interleave the benchmarks, so a burst of background load is spread over all of them
+    # and shows up as spread between rounds instead of a one-off slowdown of a single case.
+    # The calibration workload runs right before each case: when the whole machine slows down
+    # (shared vCPUs, frequency scaling) both move together and the ratio stays put
+    samples = {name: [] for name in cases}
+    relative = {name: [] for name in cases}
+    round_medians = {name: [] for name in cases}
+    for round_index in range(args.rounds):
+        for name, (func, inputs) in cases.items():
+            # Slow cases get fewer passes so the whole suite stays quick
+            repeat = args.repeat if name not in ("get_embedding", "vector_search") else max(2, args.repeat // 4)
+            reference = statistics.median(time_passes(calibration, [None] * 20, 1, 5))
+            passes = time_passes(func, inputs, args.warmup if round_index == 0 else 0, repeat)
+            samples[name].extend(passes)
+            relative[name].extend(p / reference for p in passes)
+            round_medians[name].append(statistics.median(passes) / reference)
+
+    results = {}
+    for name, (func, inputs) in cases.items():
+        results[name] = r = summarize(samples[name], relative[name], round_medians[name],
+                                      len(inputs) * len(samples[name]))
+        print(f"{name:<24}{r['median_us']:>12.2f} us  (min {r['min_us']:.2f}, mad {r['mad_us']:.2f}, "
+              f"round spread {r['round_spread'] * 100:.1f}%)")
+
+    return {
+        "meta": {
+            "host": platform.node(),
+            "cpu": cpu_model(),
+            "cpu_count": os.cpu_count(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "embedder": embedder,
+            "messages": len(messages),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": results,
+    }
+
+def compare(current, baseline, threshold):
+    """Print a comparison table; return the names of regressed benchmarks
+
+    Changes are judged on timings relative to the calibration workload, so a machine that is
+    uniformly slower than when the baseline was recorded doesn't look like a regression.
+    """
+    regressions = []
+    print(f"\n{'benchmark':<24}{'baseline':>12}{'current':>12}{'change':>10}")
+    for name, now in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<24}{'-':>12}{now['median_us']:>12.2f}{'new':>10}")
+            continue
+        change = now["relative"] / before["relative"] - 1
+        best_change = now["relative_min"] / before["relative_min"] - 1
+        # Allow the threshold or the jitter seen in either run, whichever is larger
+        noise = max(threshold,
+                    3 * before["relative_mad"] / before["relative"], 3 * now["relative_mad"] / now["relative"],
+                    before["round_spread"], now["round_spread"])
+        flag = ""
+        # Interference only ever adds time, so a real slowdown also moves the fastest pass
+        if change > noise and best_change > noise:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<24}{before['median_us']:>12.2f}{now['median_us']:>12.2f}{change * 100:>9.1f}%{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="ASAAP microbenchmarks")
+    parser.add_argument("command", choices=["run", "compare"])
+    parser.add_argument("--save", action="store_true", help="Store this run as the baseline")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="Baseline file")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Allowed slowdown before flagging (0.15 = 15%%)")
+    parser.add_argument("--warmup", type=int, default=2, help="Warm-up passes per benchmark")
+    parser.add_argument("--repeat", type=int, default=10, help="Measured passes per benchmark and round")
+    parser.add_argument("--rounds", type=int, default=3, help="Interleaved rounds over all benchmarks")
+    parser.add_argument("--limit", type=int, default=0, help="Use only the first N distinct messages")
+    parser.add_argument("--only", nargs="*", help="Run only these benchmarks")
+    parser.add_argument("--force", action="store_true", help="Compare even if the baseline environment differs")
+    parser.add_argument("--mock-models", action="store_true", help="Always use the hashing embedder")
+    args = parser.parse_args()
+
+    current = run(args)
+
+    if args.command == "compare":
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save first")
+            sys.exit(2)
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        mismatches = environment_mismatches(current, baseline)
+        if mismatches:
+            for key, before, now in mismatches:
+                print(f"⚠️  Baseline {key}: {before}, this run: {now}")
+            if not args.force:
+                print("Baseline was recorded in a different environment; timings are not comparable. "
+                      "Record one here with --save, or pass --force to compare anyway")
+                sys.exit(2)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+        print("\n✅ No regressions")
+
+    if args.save:
+        with open(args.baseline, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ set BACKEND_PORT=8000
 set FRONTEND_PORT=8501
 set VENV_DIR=venv
 set LOG_DIR=logs
+set AUTOTUNE_FILE=autotune.json
 
 REM Functions
 :log_info
@@ -106,7 +107,14 @@ REM Start backend server
 :start_backend
 call :log_info "Starting backend server on port %BACKEND_PORT%..."
 
-start /b uvicorn app.main:app --host 127.0.0.1 --port %BACKEND_PORT% > %LOG_DIR%\backend.log 2>&1
+REM Use host-tuned settings from autotune.py if present
+set ASAAP_WORKERS=1
+if exist "%AUTOTUNE_FILE%" (
+    for /f "delims=" %%i in ('python autotune.py --print-env --output "%AUTOTUNE_FILE%"') do set "%%i"
+    call :log_info "Using tuned settings from %AUTOTUNE_FILE%"
+)
+
+start /b uvicorn app.main:app --host 127.0.0.1 --port %BACKEND_PORT% --workers !ASAAP_WORKERS! > %LOG_DIR%\backend.log 2>&1
 
 REM Wait for server to start
 timeout /t 5 /nobreak >nul
@@ -232,10 +240,11 @@ if "%1"=="restart" goto restart_services
 if "%1"=="status" goto show_status
 if "%1"=="health" goto health_check
 if "%1"=="logs" goto show_logs
+if "%1"=="autotune" goto autotune
 if "%1"=="" goto deploy
 
 REM Default case - show usage
-echo Usage: %0 {deploy^|start^|stop^|restart^|status^|health^|logs}
+echo Usage: %0 {deploy^|start^|stop^|restart^|status^|health^|logs^|autotune}
 echo.
 echo Commands:
 echo   deploy  - Full deployment (setup, install, start)
@@ -245,6 +254,7 @@ echo   restart - Restart services
 echo   status  - Show application status
 echo   health  - Perform health check
 echo   logs    - Show backend logs
+echo   autotune - Tune threads/workers/batch size for this host
 exit /b 1
 
 :start_only
@@ -268,3 +278,7 @@ goto :eof
 :show_logs
 type %LOG_DIR%\backend.log
 goto :eof
+
+:autotune
+python autotune.py --output "%AUTOTUNE_FILE%"
+goto :eof
@@ -17,6 +17,7 @@ BACKEND_PORT=8000
 FRONTEND_PORT=8501
 VENV_DIR="venv"
 LOG_DIR="logs"
+AUTOTUNE_FILE="autotune.json"
 
 # Functions
 log_info() {
@@ -130,8 +131,15 @@ create_logs_dir() {
 start_backend() {
     log_info "Starting backend server on port $BACKEND_PORT..."
     
+    # Use host-tuned settings from autotune.py if present
+    ASAAP_WORKERS=1
+    if [ -f "$AUTOTUNE_FILE" ]; then
+        export $(python autotune.py --print-env --output "$AUTOTUNE_FILE")
+        log_info "Using tuned settings: workers=$ASAAP_WORKERS, torch threads=$ASAAP_TORCH_THREADS, encode batch=$ASAAP_ENCODE_BATCH_SIZE"
+    fi
+    
     # Start in background
-    nohup uvicorn app.main:app --host 127.0.0.1 --port $BACKEND_PORT > $LOG_DIR/backend.log 2>&1 &
+    nohup uvicorn app.main:app --host 127.0.0.1 --port $BACKEND_PORT --workers $ASAAP_WORKERS > $LOG_DIR/backend.log 2>&1 &
     BACKEND_PID=$!
     
     # Wait for server to start
@@ -311,8 +319,11 @@ case "${1:-deploy}" in
         echo "Backend logs:"
         tail -f $LOG_DIR/backend.log
         ;;
+    "autotune")
+        python autotune.py --output "$AUTOTUNE_FILE" "${@:2}"
+        ;;
     *)
-        echo "Usage: $0 {deploy|start|stop|restart|status|health|logs}"
+        echo "Usage: $0 {deploy|start|stop|restart|status|health|logs|autotune}"
         echo ""
         echo "Commands:"
         echo "  deploy  - Full deployment (setup, install, start)"
@@ -322,6 +333,7 @@ case "${1:-deploy}" in
         echo "  status  - Show application status"
         echo "  health  - Perform health check"
         echo "  logs    - Show backend logs"
+        echo "  autotune - Tune threads/workers/batch size for this host"
         exit 1
         ;;
 esac
@@ -9,14 +9,142 @@ import time
 import psutil
 import json
 import os
+import sqlite3
 from datetime import datetime
 import argparse
 
+def weighted_percentile(points, q):
+    """Percentile of (value, weight) pairs; downsampled buckets contribute their p95 weighted by count"""
+    points = sorted(points)
+    total = sum(weight for _, weight in points)
+    if not total:
+        return None
+    target = q / 100 * total
+    seen = 0
+    for value, weight in points:
+        seen += weight
+        if seen >= target:
+            return value
+    return points[-1][0]
+
+class MetricStore:
+    """SQLite time series: raw samples for recent history, hourly rollups for older data"""
+
+    def __init__(self, path="monitoring.db", raw_retention=7 * 86400, rollup_resolution=3600,
+                 rollup_retention=90 * 86400):
+        self.path = path
+        self.raw_retention = raw_retention
+        self.rollup_resolution = rollup_resolution
+        self.rollup_retention = rollup_retention
+        self._last_compact = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS samples (ts REAL NOT NULL, metric TEXT NOT NULL, value REAL NOT NULL);
+            CREATE INDEX IF NOT EXISTS samples_metric_ts ON samples (metric, ts);
+            CREATE TABLE IF NOT EXISTS rollups (
+                bucket INTEGER NOT NULL, metric TEXT NOT NULL, count INTEGER NOT NULL, sum REAL NOT NULL,
+                min REAL NOT NULL, max REAL NOT NULL, p95 REAL NOT NULL, PRIMARY KEY (metric, bucket)
+            );
+        """)
+
+    def record(self, metrics, ts=None):
+        """Store one check's results; a metric may hold a single value or a list of samples"""
+        ts = time.time() if ts is None else ts
+        rows = []
+        for metric, values in metrics.items():
+            for value in values if isinstance(values, (list, tuple)) else [values]:
+                if value is not None:
+                    rows.append((ts, metric, float(value)))
+        with self.conn:
+            self.conn.executemany("INSERT INTO samples VALUES (?, ?, ?)", rows)
+        if ts - self._last_compact >= self.rollup_resolution:
+            self.compact(ts)
+        return len(rows)
+
+    def compact(self, now=None):
+        """Fold raw samples older than the raw retention into rollups, then expire old rollups"""
+        now = time.time() if now is None else now
+        # Only whole buckets, so a bucket is never rolled up twice
+        cutoff = (now - self.raw_retention) // self.rollup_resolution * self.rollup_resolution
+        rows = self.conn.execute(
+            "SELECT metric, CAST(ts / ? AS INTEGER) * ?, value FROM samples WHERE ts < ? ORDER BY 1, 2",
+            (self.rollup_resolution, self.rollup_resolution, cutoff)
+        ).fetchall()
+        buckets = {}
+        for metric, bucket, value in rows:
+            buckets.setdefault((metric, bucket), []).append(value)
+        with self.conn:
+            for (metric, bucket), values in buckets.items():
+                values.sort()
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO rollups VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (bucket, metric, len(values), sum(values), values[0], values[-1],
+                     weighted_percentile([(v, 1) for v in values], 95))
+                )
+            self.conn.execute("DELETE FROM samples WHERE ts < ?", (cutoff,))
+            self.conn.execute("DELETE FROM rollups WHERE bucket < ?", (now - self.rollup_retention,))
+        self._last_compact = now
+        return len(buckets)
+
+    def metrics(self):
+        rows = self.conn.execute("SELECT DISTINCT metric FROM samples UNION SELECT DISTINCT metric FROM rollups")
+        return sorted(row[0] for row in rows)
+
+    def query(self, metric, since, until=None):
+        """[(ts, value)] in time order; downsampled ranges yield one mean per bucket"""
+        until = time.time() if until is None else until
+        rollups = self.conn.execute(
+            "SELECT bucket, sum / count FROM rollups WHERE metric = ? AND bucket >= ? AND bucket < ?",
+            (metric, since, until)
+        ).fetchall()
+        raw = self.conn.execute(
+            "SELECT ts, value FROM samples WHERE metric = ? AND ts >= ? AND ts < ?", (metric, since, until)
+        ).fetchall()
+        return sorted(rollups + raw)
+
+    def stats(self, metric, since, until=None):
+        """count/mean/min/max/p50/p95 over a window (percentiles are approximate over rollups)"""
+        until = time.time() if until is None else until
+        raw = [row[0] for row in self.conn.execute(
+            "SELECT value FROM samples WHERE metric = ? AND ts >= ? AND ts < ?", (metric, since, until))]
+        rollups = self.conn.execute(
+            "SELECT count, sum, min, max, p95 FROM rollups WHERE metric = ? AND bucket >= ? AND bucket < ?",
+            (metric, since, until)
+        ).fetchall()
+        count = len(raw) + sum(r[0] for r in rollups)
+        if not count:
+            return None
+        points = [(v, 1) for v in raw]
+        return {
+            "count": count,
+            "mean": (sum(raw) + sum(r[1] for r in rollups)) / count,
+            "min": min(raw + [r[2] for r in rollups]),
+            "max": max(raw + [r[3] for r in rollups]),
+            "p50": weighted_percentile(points + [(r[1] / r[0], r[0]) for r in rollups], 50),
+            "p95": weighted_percentile(points + [(r[4], r[0]) for r in rollups], 95),
+        }
+
+    def summary(self, since, until=None):
+        return {metric: self.stats(metric, since, until) for metric in self.metrics()}
+
+    def close(self):
+        self.conn.close()
+
 class ASAAPMonitor:
-    def __init__(self, backend_url="http://127.0.0.1:8000", frontend_url="http://localhost:8501"):
+    def __init__(self, backend_url="http://127.0.0.1:8000", frontend_url="http://localhost:8501",
+                 store=None, window=15 * 60, baseline=24 * 3600, latency_tolerance=0.5,
+                 error_rate_tolerance=10.0, min_samples=5):
         self.backend_url = backend_url
         self.frontend_url = frontend_url
         self.log_file = "monitoring.log"
+        self.store = store
+        # Regression alerting: the rolling window is compared with the baseline window right before it
+        self.window = window
+        self.baseline = baseline
+        self.latency_tolerance = latency_tolerance
+        self.error_rate_tolerance = error_rate_tolerance
+        self.min_samples = min_samples
+        self.sample = {}
         
     def log(self, message, level="INFO"):
         """Log message with timestamp"""
@@ -33,12 +161,15 @@ class ASAAPMonitor:
             response = requests.get(f"{self.backend_url}/docs", timeout=5)
             if response.status_code == 200:
                 self.log("Backend health check: PASSED")
+                self.sample["backend_up"] = 1
                 return True
             else:
                 self.log(f"Backend health check: FAILED (Status: {response.status_code})", "ERROR")
+                self.sample["backend_up"] = 0
                 return False
         except requests.exceptions.RequestException as e:
             self.log(f"Backend health check: FAILED ({str(e)})", "ERROR")
+            self.sample["backend_up"] = 0
             return False
     
     def check_frontend_health(self):
@@ -67,11 +198,13 @@ class ASAAPMonitor:
         results = []
         for message in test_messages:
             try:
+                start_time = time.time()
                 response = requests.post(
                     f"{self.backend_url}/chat",
                     data={"message": message},
                     timeout=10
                 )
+                self.sample.setdefault("response_time_ms", []).append((time.time() - start_time) * 1000)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -90,6 +223,7 @@ class ASAAPMonitor:
                 self.log(f"Chat test '{message}': FAILED ({str(e)})", "ERROR")
         
         success_rate = sum(results) / len(results) * 100
+        self.sample["success_rate"] = success_rate
         self.log(f"Chatbot functionality: {success_rate:.1f}% success rate")
         return success_rate >= 80  # 80% success rate threshold
     
@@ -106,6 +240,7 @@ class ASAAPMonitor:
             # Disk usage
             disk = psutil.disk_usage('/')
             disk_percent = disk.percent
+            self.sample.update(cpu_percent=cpu_percent, memory_percent=memory_percent, disk_percent=disk_percent)
             
             # Check thresholds
             cpu_ok = cpu_percent < 80
@@ -151,6 +286,7 @@ class ASAAPMonitor:
                     total_size += os.path.getsize(filepath)
             
             size_mb = total_size / (1024 * 1024)
+            self.sample["db_size_mb"] = size_mb
             self.log(f"Database size: {size_mb:.2f} MB")
             
             if size_mb < 1:
@@ -178,6 +314,7 @@ class ASAAPMonitor:
             response_time = (end_time - start_time) * 1000  # Convert to milliseconds
             
             if response.status_code == 200:
+                self.sample.setdefault("response_time_ms", []).append(response_time)
                 self.log(f"Response time: {response_time:.2f}ms")
                 return response_time < 5000  # 5 second threshold
             else:
@@ -191,6 +328,7 @@ class ASAAPMonitor:
     def run_full_check(self):
         """Run complete health check"""
         self.log("Starting full health check...")
+        self.sample = {}
         
         checks = {
             "Backend Health": self.check_backend_health(),
@@ -205,6 +343,10 @@ class ASAAPMonitor:
         total = len(checks)
         
         self.log(f"Health check completed: {passed}/{total} checks passed")
+
+        if self.store is not None:
+            self.store.record(self.sample)
+            self.check_regressions()
         
         if passed == total:
             self.log("All systems operational", "SUCCESS")
@@ -213,6 +355,40 @@ class ASAAPMonitor:
             self.log("Some systems have issues", "WARNING")
             return False
     
+    def check_regressions(self, now=None):
+        """Alert when rolling p95 latency or error rate drifts from the preceding baseline window"""
+        now = time.time() if now is None else now
+        window_start = now - self.window
+        alerts = []
+
+        recent = self.store.stats("response_time_ms", window_start, now)
+        base = self.store.stats("response_time_ms", window_start - self.baseline, window_start)
+        if (recent and base and recent["count"] >= self.min_samples and base["count"] >= self.min_samples
+                and recent["p95"] > base["p95"] * (1 + self.latency_tolerance)):
+            alerts.append(f"p95 latency {recent['p95']:.0f}ms over the last {self.window // 60:.0f} min "
+                          f"vs baseline {base['p95']:.0f}ms (+{(recent['p95'] / base['p95'] - 1) * 100:.0f}%)")
+
+        recent = self.store.stats("success_rate", window_start, now)
+        base = self.store.stats("success_rate", window_start - self.baseline, window_start)
+        if recent and base and min(recent["count"], base["count"]) >= self.min_samples:
+            recent_errors, base_errors = 100 - recent["mean"], 100 - base["mean"]
+            if recent_errors > base_errors + self.error_rate_tolerance:
+                alerts.append(f"error rate {recent_errors:.1f}% over the last {self.window // 60:.0f} min "
+                              f"vs baseline {base_errors:.1f}%")
+
+        for alert in alerts:
+            self.log(f"Regression: {alert}", "WARNING")
+        return alerts
+
+    def print_summary(self, hours=24):
+        """Per-metric statistics over the last N hours"""
+        since = time.time() - hours * 3600
+        print(f"{'metric':<18}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'max':>10}")
+        for metric, stats in self.store.summary(since).items():
+            if stats:
+                print(f"{metric:<18}{stats['count']:>8}{stats['mean']:>10.1f}{stats['p50']:>10.1f}"
+                      f"{stats['p95']:>10.1f}{stats['max']:>10.1f}")
+
     def continuous_monitoring(self, interval=60):
         """Run continuous monitoring"""
         self.log(f"Starting continuous monitoring (interval: {interval}s)")
@@ -234,12 +410,25 @@ def main():
     parser.add_argument("--frontend", default="http://localhost:8501", help="Frontend URL")
     parser.add_argument("--interval", type=int, default=60, help="Monitoring interval in seconds")
     parser.add_argument("--once", action="store_true", help="Run check once and exit")
+    parser.add_argument("--db", default="monitoring.db", help="Time-series database file")
+    parser.add_argument("--summary", action="store_true", help="Print metric statistics and exit")
+    parser.add_argument("--query", metavar="METRIC", help="Print a metric's samples and exit")
+    parser.add_argument("--hours", type=float, default=24, help="Time range for --summary/--query")
+    parser.add_argument("--window", type=int, default=15, help="Rolling alert window in minutes")
+    parser.add_argument("--baseline", type=float, default=24, help="Baseline window in hours")
     
     args = parser.parse_args()
     
-    monitor = ASAAPMonitor(args.backend, args.frontend)
+    store = MetricStore(args.db)
+    monitor = ASAAPMonitor(args.backend, args.frontend, store=store,
+                           window=args.window * 60, baseline=args.baseline * 3600)
     
-    if args.once:
+    if args.summary:
+        monitor.print_summary(args.hours)
+    elif args.query:
+        for ts, value in store.query(args.query, time.time() - args.hours * 3600):
+            print(f"{datetime.fromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')}  {value:.2f}")
+    elif args.once:
         monitor.run_full_check()
     else:
         monitor.continuous_monitoring(args.interval)
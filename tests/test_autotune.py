@@ -0,0 +1,38 @@
+import multiprocessing
+import os
+import threading
+import time
+
+import pytest
+
+from autotune import ASAAPAutotuner
+
+@pytest.fixture
+def ctx():
+    return multiprocessing.get_context("spawn")
+
+def test_killed_worker_aborts_the_sweep(ctx):
+    barrier = ctx.Barrier(2)
+    results = ctx.Queue()
+    procs = [ctx.Process(target=os._exit, args=(3,))]
+    procs[0].start()
+    with pytest.raises(RuntimeError, match="exited with code 3"):
+        ASAAPAutotuner._collect(procs, barrier, results, [1], poll_s=0.1)
+    procs[0].join()
+    with pytest.raises(threading.BrokenBarrierError):
+        barrier.wait(timeout=1)  # workers still waiting are released
+
+def test_reported_worker_error_is_raised(ctx):
+    barrier = ctx.Barrier(1)
+    results = ctx.Queue()
+    results.put((1, [2.0, 4.0], 1.0))
+    results.put(("error", "OSError: model not found"))
+    procs = [ctx.Process(target=time.sleep, args=(30,))]
+    procs[0].start()
+    try:
+        with pytest.raises(RuntimeError, match="model not found"):
+            ASAAPAutotuner._collect(procs, barrier, results, [1, 2], poll_s=5)
+        assert barrier.broken
+    finally:
+        procs[0].terminate()
+        procs[0].join()
@@ -0,0 +1,49 @@
+import gzip
+import json
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from app.cache_warmer import CacheWarmer, load_traffic
+
+def write_transcript(path, messages):
+    with gzip.open(path, "wt", encoding="utf-8") as f:
+        for message in messages:
+            f.write(json.dumps({"customer_message": message}) + "\n")
+        f.write("{truncated")
+
+def test_load_traffic_counts_messages(tmp_path):
+    write_transcript(tmp_path / "a.jsonl.gz", ["Is there wifi?", "is there  WIFI?", "Is there wifi?"])
+    write_transcript(tmp_path / "b.jsonl.gz", ["Can I bring my cat?"])
+    counts = load_traffic(str(tmp_path))
+    assert counts == Counter({"Is there wifi?": 2, "is there  WIFI?": 1, "Can I bring my cat?": 1})
+    assert load_traffic(str(tmp_path / "missing")) is None
+
+    top, total = CacheWarmer.top_messages(counts, 1)
+    assert top == [("Is there wifi?", 3)] and total == 4
+    assert CacheWarmer.top_messages(["b", "a", "b"], 5) == ([("b", 2), ("a", 1)], 3)
+
+class SlowBot:
+    """Chatbot stand-in whose generation takes 50 ms per message"""
+
+    def __init__(self):
+        self.generated = 0
+        self.model = SimpleNamespace(get_embeddings=lambda texts: [None] * len(texts))
+        self.semantic_cache = SimpleNamespace(cacheable=lambda intent, utterance: True,
+                                              insert=lambda intent, embedding, response: None)
+        self.policy_table = SimpleNamespace(fast_path=lambda intent: None)
+        self.enhanced_ai_generator = SimpleNamespace(generate_response=self.generate)
+
+    def detect_intent(self, utterance):
+        return "baggage_policy"
+
+    def generate(self, intent, utterance):
+        time.sleep(0.05)
+        self.generated += 1
+        return "reply"
+
+def test_budget_is_checked_inside_a_batch():
+    bot = SlowBot()
+    report = CacheWarmer(bot, top_n=100, time_budget=0.12, batch_size=100).run([f"m{i}" for i in range(100)])
+    assert report["warmed"] == bot.generated < 10
+    assert report["duration_s"] < 0.5
@@ -0,0 +1,62 @@
+import json
+import os
+import shutil
+
+import pytest
+
+from app.chatbot import AirlineChatbot
+from app.dataset_reloader import DatasetReloader
+from app.enhanced_ai_generator import ResponseTables
+
+@pytest.fixture
+def bot(tmp_path):
+    paths = {}
+    for name, source in (("policy_file", "app/airline_policy.json"), ("intents_file", "data/sample_intents.json"),
+                         ("responses_file", "app/responses.json")):
+        paths[name] = str(tmp_path / os.path.basename(source))
+        shutil.copy(source, paths[name])
+    return AirlineChatbot(lite=True, **paths)
+
+def touch_later(path):
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+def test_broken_file_leaves_everything_serving(bot):
+    tables, policy_table = bot.enhanced_ai_generator.tables, bot.policy_table
+    with open(bot.enhanced_ai_generator.responses_file, "a") as f:
+        f.write("")
+    with open(bot.policy_file, "w") as f:
+        f.write("{broken")
+    with pytest.raises(ValueError):
+        bot.reload()
+    assert bot.enhanced_ai_generator.tables is tables
+    assert bot.policy_table is policy_table
+
+def test_reload_swaps_one_tables_object(bot):
+    before = bot.enhanced_ai_generator.tables
+    bot.reload(policies=False, intents=False)
+    after = bot.enhanced_ai_generator.tables
+    assert isinstance(after, ResponseTables) and after is not before
+    assert after.record_count == before.record_count
+    with pytest.raises(AttributeError):
+        after.record_count = 0
+
+def test_failed_reload_is_retried_on_next_check(bot):
+    reloader = DatasetReloader(bot)
+    with open(bot.policy_file) as f:
+        policies = json.load(f)
+
+    with open(bot.policy_file, "w") as f:
+        f.write("{broken")
+    touch_later(bot.policy_file)
+    assert reloader.check() is None
+    assert reloader.last_error is not None
+    assert reloader.check() is None  # still broken: tried again, still failing
+
+    policies["wifi"] = "Wi-Fi is free on every flight."
+    with open(bot.policy_file, "w") as f:
+        json.dump(policies, f)
+    touch_later(bot.policy_file)
+    assert reloader.check() is not None
+    assert bot.policies["wifi"] == "Wi-Fi is free on every flight."
+    assert reloader.check() is None  # nothing changed since the successful reload
@@ -0,0 +1,44 @@
+import importlib
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+@pytest.fixture(scope="module")
+def client():
+    # Lite mode keeps the app free of the embedding model, GPT-2 and ChromaDB
+    env = {"ASAAP_LITE": "1", "ASAAP_TRANSCRIPTS": "0", "ASAAP_ADMIN_TOKEN": "secret"}
+    saved = {key: os.environ.get(key) for key in env}
+    os.environ.update(env)
+    try:
+        main = importlib.import_module("app.main")
+        with TestClient(main.app) as test_client:
+            yield test_client
+    finally:
+        for key, value in saved.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+def test_chat_policy_reply_is_not_cacheable(client):
+    response = client.post("/chat", data={"message": "Can I bring my cat on the plane?"})
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, no-store"
+    assert response.headers["content-location"] == "/policy/pet_policy"
+    assert "etag" not in response.headers
+
+def test_policy_get_is_cacheable_and_revalidates(client):
+    response = client.get("/policy/pet_policy")
+    assert response.status_code == 200
+    assert response.headers["cache-control"].startswith("public, max-age=")
+    assert response.headers["vary"] == "X-Tenant"
+
+    etag = response.headers["etag"]
+    revalidated = client.get("/policy/pet_policy", headers={"If-None-Match": etag})
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == etag
+
+def test_unknown_policy_and_tenant(client):
+    assert client.get("/policy/nope").status_code == 404
+    assert client.get("/policy/pet_policy", headers={"X-Tenant": "nobody"}).status_code == 404
@@ -0,0 +1,42 @@
+from app.latency_budget import Deadline, StageCosts
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def spiked(clock, **kwargs):
+    costs = StageCosts(clock=clock, **kwargs)
+    for _ in range(20):
+        costs.observe("embed", 20.0)
+    costs.observe("embed", 1700.0)  # one slow call
+    return costs
+
+def test_unobserved_spike_decays_back_to_the_starting_estimate():
+    clock = Clock()
+    costs = spiked(clock)
+    spike = costs.estimate("embed")
+    assert spike > 500
+    clock.now += 5.0  # one half-life: the excess over the 25 ms start and the deviation halve
+    assert abs(costs.estimate("embed") - (25.0 + (spike - 25.0) / 2)) < 1e-6
+    clock.now += 60.0
+    assert costs.estimate("embed") < 26.0
+
+def test_skipped_stage_is_probed_and_recovers():
+    clock = Clock()
+    costs = spiked(clock, probe_every=5)
+    deadline = Deadline(200)
+    decisions = [costs.allows(deadline, "embed", "generate") for _ in range(5)]
+    assert decisions == [False, False, False, False, True]
+    costs.observe("embed", 20.0)  # the probe ran; still elevated, but recovering
+    assert costs.stats()["probes"] == 1
+    assert costs.allows(None, "embed")
+
+def test_decayed_estimate_is_the_base_for_the_next_observation():
+    clock = Clock()
+    costs = spiked(clock)
+    clock.now += 60.0
+    costs.observe("embed", 20.0)
+    assert costs.estimate("embed") < 50.0
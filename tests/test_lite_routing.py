@@ -0,0 +1,46 @@
+import pytest
+
+from app.chatbot import AirlineChatbot
+from app.utterance import Utterance
+
+class FixedClassifier:
+    """Classifier double that always predicts the same intent"""
+
+    def __init__(self, intent, confidence):
+        self.intent = intent
+        self.confidence = confidence
+        self.calls = 0
+
+    def predict(self, text):
+        self.calls += 1
+        return self.intent, self.confidence
+
+@pytest.fixture(scope="module")
+def lite_bot():
+    return AirlineChatbot(lite=True)
+
+@pytest.mark.parametrize("message", [
+    "I need a ticket to New York",
+    "I need help with my booking",
+    "What's the status of my refund?",
+    "can I bring my cat",
+    "is there wifi onboard",
+])
+def test_lite_mode_keeps_keyword_intents(lite_bot, message):
+    # The bundled classifier disagrees with the rules on the first three; the rules win
+    assert lite_bot.classify(Utterance.of(message))[0] == lite_bot.detect_intent(message)
+
+def test_classifier_is_not_consulted_when_rules_match():
+    classifier = FixedClassifier("wifi", 0.99)
+    bot = AirlineChatbot(lite=True, classifier=classifier)
+    assert bot.classify(Utterance.of("can I bring my cat")) == ("pet_policy", None)
+    assert classifier.calls == 0
+
+def test_confident_classifier_labels_general_messages():
+    bot = AirlineChatbot(lite=True, classifier=FixedClassifier("baggage_policy", 0.8))
+    assert bot.detect_intent("my suitcase handle snapped") == "general"
+    assert bot.classify(Utterance.of("my suitcase handle snapped")) == ("baggage_policy", 0.8)
+
+def test_unsure_classifier_leaves_general():
+    bot = AirlineChatbot(lite=True, classifier=FixedClassifier("baggage_policy", 0.2))
+    assert bot.classify(Utterance.of("my suitcase handle snapped")) == ("general", 0.2)
@@ -0,0 +1,56 @@
+import threading
+
+from app.request_profiler import RequestProfiler
+
+def work(n):
+    return sum(i * i for i in range(n))
+
+def test_profiles_are_stored_and_rendered():
+    profiler = RequestProfiler(admin_token="secret", capacity=2)
+    assert profiler.run("trace", "first", work, 100) == work(100)
+    profiler.run("sample", "second", work, 1000)
+    profiler.run("trace", "third", work, 100)
+
+    listed = profiler.list()
+    assert [p["label"] for p in listed] == ["third", "second"]  # newest first, capacity 2
+    assert "stacks" not in listed[0]
+    assert profiler.get(listed[0]["id"])["label"] == "third"
+    assert profiler.get(1) is None  # evicted
+
+    collapsed = profiler.collapsed()
+    assert "test_request_profiler.work" in collapsed
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+
+def test_select_requires_the_admin_token():
+    profiler = RequestProfiler(admin_token="secret")
+    assert profiler.select("trace", "secret") == "trace"
+    assert profiler.select("bogus", "secret") == "sample"
+    assert profiler.select("trace", "wrong") is None
+    assert not RequestProfiler().enabled
+
+def test_reading_while_requests_add_profiles():
+    profiler = RequestProfiler(admin_token="secret", capacity=8)
+    stop = threading.Event()
+    errors = []
+
+    def requests():
+        while not stop.is_set():
+            profiler.run("trace", "load", work, 10)
+
+    def read():
+        try:
+            for _ in range(300):
+                profiler.list()
+                profiler.collapsed()
+                profiler.get(3)
+        except RuntimeError as e:  # "deque mutated during iteration"
+            errors.append(e)
+
+    writers = [threading.Thread(target=requests) for _ in range(4)]
+    for thread in writers:
+        thread.start()
+    read()
+    stop.set()
+    for thread in writers:
+        thread.join()
+    assert errors == []
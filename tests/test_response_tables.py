@@ -0,0 +1,19 @@
+import random
+from collections import Counter
+
+from app.enhanced_ai_generator import EnhancedAIResponseGenerator
+
+def rows(n, response, intent="Booking", tone="Formal"):
+    return [{"intent": intent, "bot_response": response, "tone": tone} for _ in range(n)]
+
+def test_repeated_responses_are_stored_once_and_sampled_by_count():
+    records = rows(30, "common") + rows(10, "rare", tone="Friendly") + rows(5, "bags", intent="Damaged Bag")
+    tables = EnhancedAIResponseGenerator._build_tables(iter(records))
+    assert tables.record_count == 45
+    pool = tables.intent_responses["Booking"]
+    assert len(pool) == 2
+    assert tables.response_tones == {"common": "Formal", "rare": "Friendly", "bags": "Formal"}
+
+    random.seed(0)
+    drawn = Counter(pool.choice() for _ in range(4000))
+    assert 0.7 < drawn["common"] / 4000 < 0.8  # 30 of 40 rows
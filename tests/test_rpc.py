@@ -0,0 +1,154 @@
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from app import rpc
+from app.rpc import CODEC_JSON, CODEC_MSGPACK, HEADER, RPCClient, RPCError, RPCServer
+
+CODECS = [CODEC_JSON, pytest.param(CODEC_MSGPACK, marks=pytest.mark.skipif(rpc.msgpack is None,
+                                                                         reason="msgpack not installed"))]
+
+class FakePipeline:
+    """Stands in for main.answer: echoes the message, sleeps on "slow:<seconds>", fails on "boom" """
+
+    def __init__(self):
+        self.started = []
+        self.finished = []
+
+    async def __call__(self, message, tenant=None, budget_ms=None):
+        self.started.append(message)
+        if message.startswith("slow:"):
+            await asyncio.sleep(float(message.split(":")[1]))
+        if message == "boom":
+            raise ValueError("pipeline failed")
+        self.finished.append(message)
+        return {"intent": "general", "confidence": None, "response": f"echo {message} {tenant} {budget_ms}",
+                "tone": None, "degradation": "full"}
+
+@pytest.fixture
+def server():
+    """RPCServer on an ephemeral port, run by an event loop on a background thread"""
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    pipeline = FakePipeline()
+    rpc_server = RPCServer(pipeline, max_batch=4)
+    listener = asyncio.run_coroutine_threadsafe(rpc_server.start(port=0), loop).result(5)
+    rpc_server.port = listener.sockets[0].getsockname()[1]
+    rpc_server.pipeline = pipeline
+    yield rpc_server
+    asyncio.run_coroutine_threadsafe(rpc_server.close(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join(5)
+    loop.close()
+
+def read_frame(sock):
+    header = b""
+    while len(header) < HEADER.size:
+        chunk = sock.recv(HEADER.size - len(header))
+        assert chunk, "connection closed"
+        header += chunk
+    length, codec = HEADER.unpack(header)
+    body = b""
+    while len(body) < length:
+        body += sock.recv(length - len(body))
+    return rpc.decode(body, codec)
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_encode_decode_roundtrip(codec):
+    payload = {"id": 7, "method": "chat", "message": "héllo", "tenant": None, "budget_ms": 150}
+    frame = rpc.encode(payload, codec)
+    length, frame_codec = HEADER.unpack(frame[:HEADER.size])
+    assert frame_codec == codec
+    assert length == len(frame) - HEADER.size
+    assert rpc.decode(frame[HEADER.size:], codec) == payload
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_chat_returns_structured_result(server, codec):
+    with RPCClient(port=server.port, codec=codec) as client:
+        result = client.chat("Status of UA1033 to Paris", tenant="acme", budget_ms=200)
+    assert result["response"] == "echo Status of UA1033 to Paris acme 200"
+    assert result["entities"] == {"booking_reference": "UA1033", "flight_number": "UA1033", "destination": "Paris"}
+    assert result["degradation"] == "full"
+
+@pytest.mark.parametrize("codec", CODECS)
+def test_batch_keeps_message_order(server, codec):
+    with RPCClient(port=server.port, codec=codec) as client:
+        results = client.batch(["slow:0.05", "b", "c"])
+    assert [r["response"] for r in results] == ["echo slow:0.05 None None", "echo b None None", "echo c None None"]
+
+def test_pipeline_error_is_returned_and_connection_survives(server):
+    with RPCClient(port=server.port) as client:
+        with pytest.raises(RPCError, match="pipeline failed"):
+            client.chat("boom")
+        with pytest.raises(RPCError, match="batch larger than 4"):
+            client.batch(["a"] * 5)
+        with pytest.raises(RPCError, match="unknown method"):
+            client._unary({"id": 99, "method": "nope"})
+        assert client.chat("still here")["response"] == "echo still here None None"
+    assert server.stats()["errors"] == 3
+
+def test_replies_are_matched_by_id_not_order(server):
+    sock = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+    sock.sendall(rpc.encode({"id": 1, "method": "chat", "message": "slow:0.2"}, CODEC_JSON)
+                 + rpc.encode({"id": 2, "method": "chat", "message": "fast"}, CODEC_JSON))
+    first, second = read_frame(sock), read_frame(sock)
+    sock.close()
+    assert (first["id"], second["id"]) == (2, 1)
+
+def test_frames_split_across_reads(server):
+    frame = rpc.encode({"id": 5, "method": "chat", "message": "split"}, CODEC_JSON)
+    sock = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    for i in range(len(frame)):  # one byte at a time, header included
+        sock.sendall(frame[i:i + 1])
+        time.sleep(0.001)
+    reply = read_frame(sock)
+    sock.close()
+    assert reply["id"] == 5
+    assert reply["result"]["response"] == "echo split None None"
+
+def test_stream_yields_results_as_they_complete_then_ends(server):
+    with RPCClient(port=server.port) as client:
+        results = list(client.stream(["slow:0.2", "a", "slow:0.1", "b"]))
+        # The connection is reusable after the end marker
+        assert client.chat("after")["response"] == "echo after None None"
+    seqs = [seq for seq, _ in results]
+    assert sorted(seqs) == [0, 1, 2, 3]
+    assert seqs.index(0) > seqs.index(2)  # slowest message finishes last
+    assert results[seqs.index(0)][1]["response"] == "echo slow:0.2 None None"
+
+def test_stream_end_waits_for_pending_messages(server):
+    sock = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+    sock.sendall(rpc.encode({"id": 3, "method": "stream", "seq": 0, "message": "slow:0.2"}, CODEC_JSON)
+                 + rpc.encode({"id": 3, "method": "stream", "seq": 1, "message": "boom"}, CODEC_JSON)
+                 + rpc.encode({"id": 3, "method": "stream", "end": True}, CODEC_JSON))
+    replies = [read_frame(sock) for _ in range(3)]
+    sock.close()
+    assert replies[0] == {"id": 3, "error": "pipeline failed", "seq": 1}
+    assert replies[1]["seq"] == 0 and "result" in replies[1]
+    assert replies[2] == {"id": 3, "end": True}
+
+def test_client_disconnect_does_not_cancel_running_calls(server):
+    sock = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+    sock.sendall(rpc.encode({"id": 1, "method": "chat", "message": "slow:0.2"}, CODEC_JSON))
+    deadline = time.time() + 5
+    while "slow:0.2" not in server.pipeline.started and time.time() < deadline:
+        time.sleep(0.01)
+    sock.close()  # gone before the reply is ready
+
+    deadline = time.time() + 5
+    while "slow:0.2" not in server.pipeline.finished and time.time() < deadline:
+        time.sleep(0.01)
+    assert "slow:0.2" in server.pipeline.finished
+    with RPCClient(port=server.port) as client:
+        assert client.chat("next")["response"] == "echo next None None"
+
+def test_oversized_frame_closes_connection(server):
+    sock = socket.create_connection(("127.0.0.1", server.port), timeout=5)
+    sock.sendall(HEADER.pack(rpc.MAX_FRAME_BYTES + 1, CODEC_JSON))
+    assert sock.recv(1) == b""
+    sock.close()
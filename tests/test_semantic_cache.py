@@ -0,0 +1,37 @@
+import time
+
+import numpy as np
+
+from app.semantic_cache import SemanticCache
+from app.utterance import Utterance
+
+def unit(i, dim=8):
+    return np.eye(dim, dtype=np.float32)[i]
+
+def test_hit_needs_same_intent_and_similar_embedding():
+    cache = SemanticCache(capacity=4)
+    cache.insert("wifi", unit(0), "Yes, Wi-Fi is available.")
+    assert cache.lookup("wifi", unit(0) + 0.01 * unit(1)) == "Yes, Wi-Fi is available."
+    assert cache.lookup("meals", unit(0)) is None
+    assert cache.lookup("wifi", unit(1)) is None
+    assert cache.stats()["hits"] == 1
+
+def test_wording_dependent_intents_are_not_cacheable_by_default():
+    cache = SemanticCache()
+    plain = Utterance("I want to change my flight")
+    assert not cache.cacheable("change_flight", plain)
+    assert not cache.cacheable("general", Utterance("thanks a lot"))
+    assert cache.cacheable("wifi", Utterance("is there wifi"))
+    # Entities make any reply message-specific
+    assert not cache.cacheable("wifi", Utterance("is there wifi to Paris"))
+
+def test_lru_and_expiry():
+    cache = SemanticCache(capacity=2, ttl=0.05)
+    for i in range(3):
+        cache.insert("wifi", unit(i), f"r{i}")
+    assert cache.lookup("wifi", unit(0)) is None  # least recently used went first
+    assert cache.lookup("wifi", unit(2)) == "r2"
+    time.sleep(0.06)
+    assert cache.lookup("wifi", unit(2)) is None
+    cache.insert("wifi", unit(3), "r3")
+    assert cache.stats()["entries"] == 1  # expired slots were reclaimed
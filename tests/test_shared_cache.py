@@ -0,0 +1,154 @@
+import io
+import json
+import shutil
+import socket
+import time
+
+import numpy as np
+import pytest
+
+from app.chatbot import AirlineChatbot
+from app.shared_cache import LocalKVServer, SharedCache, _command, _Connection, _read_reply, _Status
+
+def parse(data):
+    return _read_reply(io.BufferedReader(io.BytesIO(data)))
+
+def test_command_encoding():
+    assert _command("SET", "k", b"\x00v", "EX", 5) == b"*5\r\n$3\r\nSET\r\n$1\r\nk\r\n$2\r\n\x00v\r\n$2\r\nEX\r\n$1\r\n5\r\n"
+    assert _command("GET", "é") == b"*2\r\n$3\r\nGET\r\n$2\r\n\xc3\xa9\r\n"
+
+@pytest.mark.parametrize("data, expected", [
+    (b"+OK\r\n", b"OK"),
+    (b":42\r\n", 42),
+    (b"$5\r\nhe\r\no\r\n", b"he\r\no"),  # bulk strings may contain CRLF
+    (b"$0\r\n\r\n", b""),
+    (b"$-1\r\n", None),
+    (b"*3\r\n$1\r\na\r\n$-1\r\n:1\r\n", [b"a", None, 1]),
+    (b"*0\r\n", []),
+])
+def test_read_reply(data, expected):
+    assert parse(data) == expected
+
+@pytest.mark.parametrize("data", [b"-ERR unknown command\r\n", b"$5\r\nab", b"", b"+OK", b"?x\r\n"])
+def test_read_reply_errors(data):
+    with pytest.raises(ConnectionError):
+        parse(data)
+
+@pytest.mark.parametrize("value", [None, 0, 7, b"", b"+not a status", b"bin\x00\r\n", _Status(b"OK"),
+                                   [b"a", None, [1, b"b"]]])
+def test_server_encoding_roundtrip(value):
+    assert parse(LocalKVServer._encode(value)) == value
+
+def test_status_is_distinct_from_stored_value():
+    assert LocalKVServer._encode(_Status(b"OK")) == b"+OK\r\n"
+    assert LocalKVServer._encode(b"OK") == b"$2\r\nOK\r\n"
+
+@pytest.fixture
+def server():
+    kv = LocalKVServer()
+    kv.start()
+    yield kv
+    kv.stop()
+
+@pytest.fixture
+def conn(server):
+    connection = _Connection("127.0.0.1", server.port, timeout=2)
+    yield connection
+    connection.close()
+
+def test_local_server_commands(conn):
+    replies = conn.pipeline([
+        _command("PING"),
+        _command("SET", "a", "1"),
+        _command("SET", "b", "+2"),
+        _command("GET", "a"),
+        _command("MGET", "a", "missing", "b"),
+        _command("DBSIZE"),
+        _command("DEL", "a", "missing"),
+        _command("GET", "a"),
+        _command("FLUSHDB"),
+        _command("DBSIZE"),
+    ])
+    assert replies == [b"PONG", b"OK", b"OK", b"1", [b"1", None, b"+2"], 2, 1, None, b"OK", 0]
+
+def test_local_server_expiry(conn):
+    conn.pipeline([_command("SET", "short", "x", "PX", 50), _command("SET", "long", "y", "EX", 60)])
+    time.sleep(0.1)
+    assert conn.pipeline([_command("MGET", "short", "long")]) == [[None, b"y"]]
+
+def test_local_server_unknown_command(conn):
+    with pytest.raises(ConnectionError, match="unknown command"):
+        conn.pipeline([_command("HGETALL", "k")])
+
+def test_local_server_reads_split_commands(server):
+    sock = socket.create_connection(("127.0.0.1", server.port), timeout=2)
+    for byte in _command("SET", "split", "value"):
+        sock.sendall(bytes([byte]))
+    assert sock.recv(64) == b"+OK\r\n"
+    sock.close()
+
+def test_embeddings_roundtrip_and_model_isolation(server):
+    cache = SharedCache(port=server.port, timeout=1)
+    vectors = np.random.default_rng(0).standard_normal((2, 4)).astype(np.float32)
+    cache.set_embeddings("minilm", [("a", vectors[0]), ("b", vectors[1])])
+
+    found = cache.get_embeddings("minilm", ["a", "missing", "b"])
+    np.testing.assert_array_equal(found[0], vectors[0])
+    assert found[1] is None
+    np.testing.assert_array_equal(found[2], vectors[1])
+    # Another embedding model never sees these vectors
+    assert cache.get_embeddings("other-model", ["a", "b"]) == [None, None]
+    assert cache.stats()["embedding"]["hits"] == 2
+    cache.close()
+
+def test_responses_are_keyed_by_scope_and_dataset_version(server):
+    cache = SharedCache(port=server.port, timeout=1)
+    cache.set_response("default", "v1", "wifi", "is there wifi", "Yes, on all flights.")
+    assert cache.get_response("default", "v1", "wifi", "is there wifi") == "Yes, on all flights."
+    assert cache.get_response("default", "v2", "wifi", "is there wifi") is None
+    assert cache.get_response("acme", "v1", "wifi", "is there wifi") is None
+    cache.close()
+
+def test_unreachable_server_misses_and_opens_breaker():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()  # nothing listens here
+
+    cache = SharedCache(port=port, timeout=0.05, failure_threshold=2, reset_timeout=60)
+    assert cache.get_embeddings("minilm", ["a", "b"]) == [None, None]
+    assert cache.get_response("default", "v1", "wifi", "hi") is None
+    assert cache.stats()["breaker"] == "open"
+    assert cache.get_response("default", "v1", "wifi", "hi") is None  # short-circuited
+    assert cache.stats()["response"]["errors"] == 2
+
+def test_dataset_version_follows_file_contents(tmp_path):
+    paths = {}
+    for name, source in (("policy_file", "app/airline_policy.json"), ("intents_file", "data/sample_intents.json"),
+                         ("responses_file", "app/responses.json")):
+        paths[name] = str(tmp_path / source.split("/")[-1])
+        shutil.copy(source, paths[name])
+    bot = AirlineChatbot(lite=True, **paths)
+    other = AirlineChatbot(lite=True, **paths)
+    assert bot.dataset_version == other.dataset_version  # same files, same keys on every node
+
+    version = bot.dataset_version
+    assert bot.reload()["dataset_version"] == version
+
+    with open(paths["policy_file"]) as f:
+        policies = json.load(f)
+    policies["wifi"] = "Wi-Fi is now free on every flight."
+    with open(paths["policy_file"], "w") as f:
+        json.dump(policies, f)
+    bot.reload(responses=False, intents=False)
+    assert bot.dataset_version != version
+
+def test_failed_reload_keeps_dataset_version(tmp_path):
+    policy_file = tmp_path / "airline_policy.json"
+    shutil.copy("app/airline_policy.json", policy_file)
+    bot = AirlineChatbot(lite=True, policy_file=str(policy_file))
+    version = bot.dataset_version
+    policy_file.write_text("{broken")
+    with pytest.raises(ValueError):
+        bot.reload()
+    assert bot.dataset_version == version
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.single_flight import SingleFlight, coalesce_key
+
+class Blocking:
+    """Threadpool function that waits for release() and counts its calls"""
+
+    def __init__(self, result="reply", error=None):
+        self.result = result
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, message):
+        self.calls += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if self.error is not None:
+            raise self.error
+        return f"{self.result}:{message}"
+
+async def wait_started(func):
+    assert await asyncio.to_thread(func.started.wait, 5)
+
+def test_concurrent_callers_share_one_call():
+    async def scenario():
+        flight = SingleFlight()
+        func = Blocking()
+        first = asyncio.ensure_future(flight.run("k", func, "hi"))
+        await wait_started(func)
+        second = asyncio.ensure_future(flight.run("k", func, "hi"))
+        await asyncio.sleep(0)
+        func.release.set()
+        return func, flight, await asyncio.gather(first, second)
+
+    func, flight, results = asyncio.run(scenario())
+    assert results == ["reply:hi", "reply:hi"]
+    assert func.calls == 1
+    assert flight.stats()["computed"] == 1
+    assert flight.stats()["deduplicated"] == 1
+    assert flight.stats()["in_flight"] == 0
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flight = SingleFlight()
+        func = Blocking()
+        func.release.set()
+        return func, await asyncio.gather(flight.run("a", func, "a"), flight.run("b", func, "b"))
+
+    func, results = asyncio.run(scenario())
+    assert results == ["reply:a", "reply:b"]
+    assert func.calls == 2
+
+def test_error_reaches_every_waiter_and_is_not_remembered():
+    async def scenario():
+        flight = SingleFlight()
+        func = Blocking(error=RuntimeError("backend down"))
+        first = asyncio.ensure_future(flight.run("k", func, "hi"))
+        await wait_started(func)
+        second = asyncio.ensure_future(flight.run("k", func, "hi"))
+        await asyncio.sleep(0)
+        func.release.set()
+        results = await asyncio.gather(first, second, return_exceptions=True)
+
+        # The failure isn't cached: the next caller computes again
+        retry = Blocking()
+        retry.release.set()
+        return flight, results, await flight.run("k", retry, "hi"), retry
+
+    flight, results, retried, retry = asyncio.run(scenario())
+    assert [str(r) for r in results] == ["backend down", "backend down"]
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert retried == "reply:hi"
+    assert retry.calls == 1
+    assert flight.stats()["errors"] == 1
+
+def test_cancelled_caller_does_not_cancel_shared_work():
+    async def scenario():
+        flight = SingleFlight()
+        func = Blocking()
+        leader = asyncio.ensure_future(flight.run("k", func, "hi"))
+        await wait_started(func)
+        follower = asyncio.ensure_future(flight.run("k", func, "hi"))
+        await asyncio.sleep(0)
+
+        leader.cancel()  # e.g. the client disconnected
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert flight.stats()["in_flight"] == 1
+
+        func.release.set()
+        return func, flight, await follower
+
+    func, flight, result = asyncio.run(scenario())
+    assert result == "reply:hi"
+    assert func.calls == 1
+    assert flight.stats()["in_flight"] == 0
+
+def test_late_caller_after_completion_recomputes():
+    async def scenario():
+        flight = SingleFlight()
+        func = Blocking()
+        func.release.set()
+        await flight.run("k", func, "hi")
+        await flight.run("k", func, "hi")
+        return func
+
+    assert asyncio.run(scenario()).calls == 2
+
+def test_coalesce_key_normalizes_case_and_whitespace():
+    assert coalesce_key("  Is my  flight\tdelayed? ") == coalesce_key("is my flight delayed?")
+    assert coalesce_key("hi", "tenant-a") != coalesce_key("hi", "tenant-b")
+
+def test_coalesce_key_keeps_case_with_flight_numbers():
+    # Case decides whether a flight number is recognised, so it must not be folded
+    assert coalesce_key("Status of UA1033") != coalesce_key("status of ua1033")
@@ -0,0 +1,35 @@
+from types import SimpleNamespace
+
+import chromadb
+import numpy as np
+
+from app.tenants import VECTOR_OVERHEAD_BYTES, TenantRegistry
+from app.vector_db import VectorDB
+
+class BigProvider:
+    """Stands in for the process-wide flight data provider"""
+
+    def __init__(self):
+        self.payload = np.zeros(4 * 1024 * 1024, dtype=np.uint8)
+
+def test_shared_objects_are_not_counted_per_tenant():
+    provider = BigProvider()
+    shared = TenantRegistry({"acme": {}}, model=None, lite=True, flight_data=provider)
+    alone = TenantRegistry({"acme": {}}, model=None, lite=True)
+    shared.get("acme")
+    alone.get("acme")
+    difference = shared.stats()["tenants"]["acme"]["memory_bytes"] - alone.stats()["tenants"]["acme"]["memory_bytes"]
+    assert abs(difference) < provider.payload.nbytes // 4
+
+def test_collection_is_sized_and_deleted_on_eviction():
+    client = chromadb.EphemeralClient()
+    registry = TenantRegistry({"acme": {}, "bluejet": {}}, model=None, chroma_client=client, max_tenants=1)
+    db = VectorDB(collection_name="intent_vectors_acme", client=client)
+    db.insert(np.random.default_rng(0).standard_normal((10, 8)).tolist(), ids=[str(i) for i in range(10)])
+    assert registry._collection_bytes(db) == 10 * (8 * 4 + VECTOR_OVERHEAD_BYTES)
+
+    registry._resident["acme"] = {"bot": SimpleNamespace(db=db), "bytes": 0, "loaded_at": 0}
+    registry._resident["bluejet"] = {"bot": SimpleNamespace(db=None), "bytes": 0, "loaded_at": 0}
+    registry._evict()
+    assert list(registry._resident) == ["bluejet"]
+    assert "intent_vectors_acme" not in [c.name for c in client.list_collections()]
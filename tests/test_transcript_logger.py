@@ -0,0 +1,45 @@
+import gzip
+import json
+import os
+import threading
+
+from app.transcript_logger import TranscriptLogger
+
+def read_records(directory):
+    records = []
+    for name in sorted(os.listdir(directory)):
+        with gzip.open(os.path.join(directory, name), "rt", encoding="utf-8") as f:
+            records.extend(json.loads(line) for line in f)
+    return records
+
+def test_turns_are_written_as_gzip_jsonl(tmp_path):
+    logger = TranscriptLogger(directory=str(tmp_path), flush_interval=0.05)
+    reply = {"intent": "wifi", "response": "Yes.", "tone": "Informative", "confidence": None, "degradation": "full"}
+    assert logger.log_turn("is there wifi", reply, tenant="acme")
+    logger.close()
+
+    (record,) = read_records(tmp_path)
+    assert record["customer_message"] == "is there wifi"
+    assert record["bot_response"] == "Yes."
+    assert record["tenant"] == "acme"
+    assert logger.stats()["written"] == 1
+
+def test_counters_add_up_under_concurrent_logging(tmp_path):
+    logger = TranscriptLogger(directory=str(tmp_path), max_queue=500, batch_size=64, flush_interval=0.01)
+    per_thread = 2000
+
+    def produce():
+        for i in range(per_thread):
+            logger.log({"n": i})
+
+    threads = [threading.Thread(target=produce) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    logger.close()
+
+    stats = logger.stats()
+    assert stats["enqueued"] + stats["dropped"] == 8 * per_thread
+    assert stats["written"] == stats["enqueued"]
+    assert len(read_records(tmp_path)) == stats["written"]